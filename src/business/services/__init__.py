@@ -1,8 +1,11 @@
 from .auth import UserService
 from .auth_dependency import (
     AccessTokenFromCookie,
+    CurrentUser,
+    ExistingUser,
     RefreshTokenFromCookie,
     get_current_user,
+    load_user,
     TokenFromCookie,
 )
 from .auth_util import create_access_token, create_refresh_token, verify_password
@@ -11,7 +14,9 @@ from .auth_util import (
     decode_token,
     generate_password_hash,
 )
+from .match import run_matchmaker
 from .match_consumer import run_consumer
+from .match_timers import run_match_timers
 
 __all__ = [
     "UserService",
@@ -24,6 +29,11 @@ __all__ = [
     "AccessTokenFromCookie",
     "RefreshTokenFromCookie",
     "get_current_user",
+    "CurrentUser",
+    "ExistingUser",
+    "load_user",
     "get_user_service",
     "run_consumer",
+    "run_match_timers",
+    "run_matchmaker",
 ]
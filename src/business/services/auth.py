@@ -1,23 +1,54 @@
+import uuid
+
 from fastapi import Depends
 from pydantic import UUID4
 from sqlmodel import select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.business.services.auth_util import generate_password_hash
-from src.data.repositories import get_session
-from src.data.schemas import User, UserCreateModel
+from src.config import logger
+from src.data.repositories import get_session, redis_client
+from src.data.schemas import User, UserCreateModel, UserResponseModel
+
+# Create a module-specific logger
+auth_logger = logger.getChild("auth")
 
 
 class UserService:
     @staticmethod
-    async def get_user_by_id(user_id: UUID4, session: AsyncSession) -> User | None:
-        result = await session.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+    async def get_user_by_id(user_id: UUID4 | str, session: AsyncSession) -> User | None:
+        # IDs read from token claims arrive as strings
+        if not isinstance(user_id, uuid.UUID):
+            user_id = uuid.UUID(user_id)
+        return await session.get(User, user_id)
+
+    @staticmethod
+    async def get_cached_user(
+        user_id: UUID4, session: AsyncSession
+    ) -> UserResponseModel | None:
+        """Return the public view of a user, served from Redis when possible."""
+        # The cache is only an accelerator: fall back to the database on errors
+        try:
+            cached = await redis_client.get_cached_user(user_id)
+        except Exception as e:
+            auth_logger.warning("User cache unavailable for %s: %s", user_id, e)
+            cached = None
+        if cached:
+            return UserResponseModel.model_validate_json(cached)
+
+        user = await UserService.get_user_by_id(user_id, session)
+        if not user:
+            return None
+        user_data = UserResponseModel.model_validate(user)
+        try:
+            await redis_client.cache_user(user_id, user_data.model_dump_json())
+        except Exception as e:
+            auth_logger.warning("Failed to cache user %s: %s", user_id, e)
+        return user_data
 
     @staticmethod
     async def get_user_by_username(username: str, session: AsyncSession) -> User | None:
-        result = await session.execute(select(User).where(User.username == username))
-        return result.scalar_one_or_none()
+        return await session.scalar(select(User).where(User.username == username))
 
     @staticmethod
     async def create_user(user_data: UserCreateModel, session: AsyncSession) -> User:
@@ -1,6 +1,12 @@
+import uuid
+from typing import Annotated
+
 from fastapi import Depends, HTTPException, Request, status
 from starlette.websockets import WebSocket, WebSocketDisconnect
-from src.data.schemas import UserBaseResponse
+from src.business.services.auth import UserService
+from src.data.repositories import DbSession
+from src.data.schemas import UserBaseResponse, UserResponseModel
+from src.errors import ResourceNotFoundException
 
 
 class TokenFromCookie:
@@ -52,13 +58,37 @@ class RefreshTokenFromCookie(TokenFromCookie):
         super().__init__(cookie_name="refresh_token")
 
 
-def get_current_user(
-    token_data: dict = Depends(AccessTokenFromCookie()),
-) -> UserBaseResponse:
+_access_token_from_cookie = AccessTokenFromCookie()
+
+
+async def get_current_user(request: Request) -> UserBaseResponse:
+    # The decoded user is kept on the request, so the token is parsed only once
+    # however many dependencies ask for it
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+
+    token_data = await _access_token_from_cookie(request)
     try:
         user = UserBaseResponse(**token_data["user"])
-        return user
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate user"
         )
+    request.state.user = user
+    return user
+
+
+CurrentUser = Annotated[UserBaseResponse, Depends(get_current_user)]
+
+
+async def load_user(user_id: uuid.UUID, db: DbSession) -> UserResponseModel:
+    # Resolves the route's user_id parameter through the Redis user cache, so
+    # repeat callers skip the existence query
+    user = await UserService.get_cached_user(user_id, db)
+    if not user:
+        raise ResourceNotFoundException(detail="User not found")
+    return user
+
+
+ExistingUser = Annotated[UserResponseModel, Depends(load_user)]
@@ -1,23 +1,31 @@
 import asyncio
-import json
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import logger
+from src.config import Config, logger
+from src.data.repositories.database import async_session_factory
+from src.data.repositories.redis import redis_client
 from src.data.repositories.match_repository import (
+    DB_UTC_NOW,
+    accept_pending_match,
     get_match_by_id,
+    get_match_for_participant,
     finish_match_with_winner,
+    transition_match,
 )
-from src.data.repositories.user_repository import get_users_by_ids
-from src.data.schemas import Match, MatchStatus, Problem, User
-from src.data.schemas.match import PlayerQueueEntry
+from src.data.repositories.user_repository import (
+    get_usernames_by_ids,
+    get_users_by_ids,
+)
+from src.data.schemas import Match, MatchStatus, Problem
+from src.data.schemas.match import MatchFoundNotification, PlayerQueueEntry
 from src.errors import (
     AuthorizationException,
-    BadRequestException,
     ResourceNotFoundException,
     ValidationException,
     DatabaseException,
@@ -30,29 +38,57 @@ match_logger = logger.getChild("match")
 # In-memory queue for matchmaking
 player_queue: List[PlayerQueueEntry] = []
 
+# Guards player_queue so concurrent queue runs never pair the same player twice
+player_queue_lock = asyncio.Lock()
+
+# Set when a player joins the queue; wakes this worker's matchmaker
+player_queued = asyncio.Event()
+
+# Delay before requeued players are paired again, so a failing database is
+# not retried in a tight loop
+REQUEUE_RETRY_DELAY_SECONDS = 2
+
+# Sorted sets of match IDs scored by the unix time their timeout fires at
+ACCEPT_DEADLINES_KEY = "match:accept_deadlines"
+DRAW_DEADLINES_KEY = "match:draw_deadlines"
+
+
+async def schedule_acceptance_timeout(match_id: uuid.UUID) -> None:
+    """Cancel the match if it is still pending once the accept window ends."""
+    deadline = time.time() + Config.MATCH_ACCEPT_TIMEOUT_SECONDS
+    await redis_client.zadd(ACCEPT_DEADLINES_KEY, {str(match_id): deadline})
+
+
+async def schedule_draw_timeout(match_id: uuid.UUID) -> None:
+    """End the match as a draw if it is still active once its time runs out."""
+    deadline = time.time() + Config.MATCH_DURATION_SECONDS
+    await redis_client.zadd(DRAW_DEADLINES_KEY, {str(match_id): deadline})
+
 
 async def add_player_to_queue(user_id: uuid.UUID, rating: int) -> bool:
     """
     Add a player to the matchmaking queue.
     Returns True if added, False if already in queue.
     """
-    # Check if user is already in the queue
-    for entry in player_queue:
-        if entry.user_id == user_id:
-            match_logger.info(f"Player {user_id} is already in the queue.")
-            return False
-
-    # Create a queue entry
-    entry = PlayerQueueEntry(
-        user_id=user_id, rating=rating, timestamp=datetime.utcnow()
-    )
+    async with player_queue_lock:
+        # Check if user is already in the queue
+        for entry in player_queue:
+            if entry.user_id == user_id:
+                match_logger.info("Player %s is already in the queue.", user_id)
+                return False
+
+        # Create a queue entry
+        entry = PlayerQueueEntry(
+            user_id=user_id, rating=rating, timestamp=datetime.utcnow()
+        )
 
-    # Add to queue
-    player_queue.append(entry)
-    match_logger.info(
-        f"Player {user_id} added to queue. Queue size: {len(player_queue)}"
-    )
-    return True
+        # Add to queue
+        player_queue.append(entry)
+        match_logger.info(
+            "Player %s added to queue. Queue size: %s", user_id, len(player_queue)
+        )
+        player_queued.set()
+        return True
 
 
 async def remove_player_from_queue(user_id: uuid.UUID) -> bool:
@@ -60,140 +96,204 @@ async def remove_player_from_queue(user_id: uuid.UUID) -> bool:
     Remove a player from the matchmaking queue.
     Returns True if removed, False if not found.
     """
-    global player_queue
-    initial_len = len(player_queue)
-    player_queue = [entry for entry in player_queue if entry.user_id != user_id]
-    removed = len(player_queue) < initial_len
+    async with player_queue_lock:
+        initial_len = len(player_queue)
+        player_queue[:] = [entry for entry in player_queue if entry.user_id != user_id]
+        removed = len(player_queue) < initial_len
     if removed:
         match_logger.info(
-            f"Player {user_id} removed from queue. Queue size: {len(player_queue)}"
+            "Player %s removed from queue. Queue size: %s", user_id, len(player_queue)
         )
     else:
-        match_logger.info(f"Player {user_id} not found in queue for removal.")
+        match_logger.info("Player %s not found in queue for removal.", user_id)
     return removed
 
 
-async def process_match_queue(
-    db: AsyncSession, match_acceptance_timeout_cb=None, match_draw_timeout_cb=None
-) -> List[Match]:
+async def pop_matched_pairs() -> List[Tuple[PlayerQueueEntry, PlayerQueueEntry]]:
+    """
+    Pair up queued players by closest rating and remove them from the queue.
+    The whole pairing step runs under the queue lock, so concurrent callers
+    always receive disjoint pairs.
+    """
+    pairs = []
+    async with player_queue_lock:
+        if len(player_queue) < 2:
+            return pairs
+
+        # Sort queue by timestamp (oldest first)
+        player_queue.sort(key=lambda x: x.timestamp)
+
+        while len(player_queue) >= 2:
+            player1 = player_queue[0]
+
+            # Find the player with the closest rating
+            best_match_idx = min(
+                range(1, len(player_queue)),
+                key=lambda j: abs(player1.rating - player_queue[j].rating),
+            )
+            player2 = player_queue.pop(best_match_idx)
+            player_queue.pop(0)
+            pairs.append((player1, player2))
+    return pairs
+
+
+async def requeue_players(*entries: PlayerQueueEntry) -> None:
+    """
+    Put players back into the queue, keeping their original timestamps, and
+    wake the matchmaker for them after a short delay.
+    """
+    async with player_queue_lock:
+        queued_ids = {entry.user_id for entry in player_queue}
+        player_queue.extend(e for e in entries if e.user_id not in queued_ids)
+    # Without this they would wait for an unrelated player to join
+    asyncio.get_running_loop().call_later(
+        REQUEUE_RETRY_DELAY_SECONDS, player_queued.set
+    )
+
+
+async def process_match_queue(db: AsyncSession) -> List[Match]:
     """
     Process the matchmaking queue to create matches between players.
 
     Args:
         db: Database session
-        match_acceptance_timeout_cb: Callback function for match acceptance timeout
-        match_draw_timeout_cb: Callback function for match draw timeout
 
     Returns:
         List of created matches
     """
     created_matches = []
-    if len(player_queue) < 2:
+    pairs = await pop_matched_pairs()
+    if not pairs:
         return created_matches
 
-    match_logger.info(f"Processing match queue. Queue size: {len(player_queue)}")
+    match_logger.info("Processing match queue. Pairs found: %s", len(pairs))
 
-    # Sort queue by timestamp (oldest first)
-    player_queue.sort(key=lambda x: x.timestamp)
+    for player1, player2 in pairs:
+        # Create a match
+        try:
+            # Select a problem for the match
+            problem_id = await select_problem_for_match(
+                db, player1.user_id, player2.user_id, player1.rating, player2.rating
+            )
 
-    # Process queue
-    i = 0
-    while i < len(player_queue) - 1:
-        player1 = player_queue[i]
+            # Create match in database
+            new_match = Match(
+                player1_id=player1.user_id,
+                player2_id=player2.user_id,
+                problem_id=problem_id,
+                status=MatchStatus.PENDING,
+                start_time=datetime.utcnow(),
+            )
 
-        # Find a suitable opponent
-        best_match_idx = -1
-        min_rating_diff = float("inf")
+            db.add(new_match)
+            await db.commit()
+            await db.refresh(new_match)
+        except Exception as e:
+            match_logger.error("Error creating match: %s", e)
+            await db.rollback()
+            await requeue_players(player1, player2)
+            continue
 
-        for j in range(i + 1, len(player_queue)):
-            player2 = player_queue[j]
-            rating_diff = abs(player1.rating - player2.rating)
+        match_logger.info(
+            "Match created: %s between players %s and %s",
+            new_match.id,
+            player1.user_id,
+            player2.user_id,
+        )
 
-            # Find the player with the closest rating
-            if rating_diff < min_rating_diff:
-                min_rating_diff = rating_diff
-                best_match_idx = j
-
-        if best_match_idx != -1:
-            player2 = player_queue[best_match_idx]
-
-            # Create a match
-            try:
-                # Select a problem for the match
-                problem_id = await select_problem_for_match(
-                    db, player1.user_id, player2.user_id, player1.rating, player2.rating
-                )
-
-                # Create match in database
-                new_match = Match(
-                    player1_id=player1.user_id,
-                    player2_id=player2.user_id,
-                    problem_id=problem_id,
-                    status=MatchStatus.PENDING,
-                    start_time=datetime.utcnow(),
-                )
-
-                db.add(new_match)
-                await db.commit()
-                await db.refresh(new_match)
-
-                created_matches.append(new_match)
-                match_logger.info(
-                    f"Match created: {new_match.id} between players {player1.user_id} and {player2.user_id}"
-                )
-
-                # Get usernames
-                result1 = await db.execute(
-                    select(User).where(User.id == player1.user_id)
-                )
-                user1 = result1.scalar_one_or_none()
-                result2 = await db.execute(
-                    select(User).where(User.id == player2.user_id)
-                )
-                user2 = result2.scalar_one_or_none()
-
-                # Notify both players with usernames
-                await send_match_notification(
+        # The match is committed from here on, so a failure must not simply
+        # requeue the players: that would leave them with two open matches.
+        # Start the timeout for match acceptance first; a pending match
+        # without one would never expire, so it is cancelled instead
+        try:
+            await schedule_acceptance_timeout(new_match.id)
+        except Exception as e:
+            match_logger.error(
+                "Could not schedule acceptance timeout for match %s: %s",
+                new_match.id,
+                e,
+            )
+            await cancel_unscheduled_match(db, new_match, player1, player2)
+            continue
+
+        created_matches.append(new_match)
+
+        try:
+            # Get usernames
+            usernames = await get_usernames_by_ids(
+                db, [player1.user_id, player2.user_id]
+            )
+
+            # Notify both players with usernames
+            match_id_str = str(new_match.id)
+            problem_id_str = str(problem_id) if problem_id else None
+            await asyncio.gather(
+                send_match_found_notification(
                     str(player1.user_id),
-                    {
-                        "status": "match_found",
-                        "match_id": str(new_match.id),
-                        "opponent_username": user2.username if user2 else "",
-                        "problem_id": str(problem_id) if problem_id else None,
-                    },
-                )
-                await send_match_notification(
+                    match_id_str,
+                    usernames.get(player2.user_id, ""),
+                    problem_id_str,
+                ),
+                send_match_found_notification(
                     str(player2.user_id),
-                    {
-                        "status": "match_found",
-                        "match_id": str(new_match.id),
-                        "opponent_username": user1.username if user1 else "",
-                        "problem_id": str(problem_id) if problem_id else None,
-                    },
-                )
-
-                # Start 15s timeout for match acceptance
-                if match_acceptance_timeout_cb:
-                    asyncio.create_task(
-                        match_acceptance_timeout_cb(str(new_match.id), db)
-                    )
-                # Start 45-min timeout for draw
-                if match_draw_timeout_cb:
-                    asyncio.create_task(match_draw_timeout_cb(str(new_match.id), db))
-
-                # Remove both players from queue
-                player_queue.pop(best_match_idx)
-                player_queue.pop(i)
-
-            except Exception as e:
-                match_logger.error(f"Error creating match: {str(e)}")
-                i += 1
-        else:
-            i += 1
+                    match_id_str,
+                    usernames.get(player1.user_id, ""),
+                    problem_id_str,
+                ),
+            )
+        except Exception as e:
+            # The acceptance timeout still cancels the match if nobody hears of it
+            match_logger.error(
+                "Error notifying players of match %s: %s", new_match.id, e
+            )
 
     return created_matches
 
 
+async def cancel_unscheduled_match(
+    db: AsyncSession,
+    match: Match,
+    player1: PlayerQueueEntry,
+    player2: PlayerQueueEntry,
+) -> None:
+    """
+    Cancel a freshly created match whose acceptance timeout could not be
+    scheduled. Once it is no longer open, its players go back to the queue.
+    """
+    try:
+        cancelled = await transition_match(
+            db,
+            match.id,
+            MatchStatus.PENDING,
+            status=MatchStatus.CANCELLED,
+            end_time=DB_UTC_NOW,
+        )
+        await db.commit()
+    except Exception as e:
+        match_logger.error("Error cancelling unscheduled match %s: %s", match.id, e)
+        await db.rollback()
+        return
+    if cancelled:
+        match_logger.info("Cancelled unscheduled match %s", match.id)
+        await requeue_players(player1, player2)
+
+
+async def run_matchmaker() -> None:
+    """
+    Process the queue whenever players join, one run at a time.
+    Joins that arrive during a run are handled by the next one.
+    """
+    match_logger.info("Starting matchmaker")
+    while True:
+        await player_queued.wait()
+        player_queued.clear()
+        try:
+            async with async_session_factory() as db:
+                await process_match_queue(db)
+        except Exception as e:
+            match_logger.error("Error in matchmaker: %s", e)
+
+
 async def select_problem_for_match(
     db: AsyncSession, player1_id: uuid.UUID, player2_id: uuid.UUID, player1_rating: int, player2_rating: int
 ) -> Optional[uuid.UUID]:
@@ -220,11 +320,16 @@ async def select_problem_for_match(
             match_logger.warning("No suitable problem found for match")
             return None
 
-        match_logger.info(f"Selected problem {problem_id} for match between players {player1_id} and {player2_id}")
+        match_logger.info(
+            "Selected problem %s for match between players %s and %s",
+            problem_id,
+            player1_id,
+            player2_id,
+        )
         return problem_id
 
     except Exception as e:
-        match_logger.error(f"Error selecting problem: {str(e)}")
+        match_logger.error("Error selecting problem: %s", e)
         return None
 
 
@@ -239,9 +344,57 @@ async def send_match_notification(user_id: str, data: Dict[str, Any]) -> None:
     try:
         # Send via WebSocket if user is connected
         await manager.send_match_notification(user_id, data)
-        match_logger.debug(f"Notification sent to user {user_id}: {json.dumps(data)}")
+        match_logger.debug(
+            "Notification sent to user %s: %s", user_id, data.get("status")
+        )
+    except Exception as e:
+        match_logger.error("Error sending notification to user %s: %s", user_id, e)
+
+
+async def broadcast_match_notification(
+    user_ids: List[str], data: Dict[str, Any]
+) -> None:
+    """
+    Send the same match notification to several users.
+
+    Args:
+        user_ids: The IDs of the users to notify
+        data: The notification data, serialized once for all of them
+    """
+    try:
+        await manager.broadcast(user_ids, data)
+        match_logger.debug(
+            "Notification sent to users %s: %s", user_ids, data.get("status")
+        )
+    except Exception as e:
+        match_logger.error("Error sending notification to users %s: %s", user_ids, e)
+
+
+async def send_match_found_notification(
+    user_id: str, match_id: str, opponent_username: str, problem_id: Optional[str]
+) -> None:
+    """
+    Send a match_found notification to a user.
+
+    The payload is encoded straight to JSON by pydantic-core, skipping the
+    intermediate dict used by send_match_notification.
+
+    Args:
+        user_id: The ID of the user to notify
+        match_id: The ID of the created match, already stringified
+        opponent_username: Username of the opponent
+        problem_id: The ID of the selected problem, already stringified
+    """
+    notification = MatchFoundNotification(
+        match_id=match_id,
+        opponent_username=opponent_username,
+        problem_id=problem_id,
+    )
+    try:
+        await manager.send_raw(user_id, notification.model_dump_json())
+        match_logger.debug("Notification sent to user %s: match_found", user_id)
     except Exception as e:
-        match_logger.error(f"Error sending notification to user {user_id}: {str(e)}")
+        match_logger.error("Error sending notification to user %s: %s", user_id, e)
 
 
 async def cancel_expired_matches(db: AsyncSession) -> None:
@@ -253,7 +406,8 @@ async def cancel_expired_matches(db: AsyncSession) -> None:
     """
     try:
         # Find matches that have been pending for more than 5 minutes
-        expiry_time = datetime.utcnow() - timedelta(minutes=5)
+        now = datetime.utcnow()
+        expiry_time = now - timedelta(minutes=5)
 
         result = await db.execute(
             select(Match).where(
@@ -265,34 +419,24 @@ async def cancel_expired_matches(db: AsyncSession) -> None:
 
         for match in pending_matches:
             match.status = MatchStatus.CANCELLED
-            match.end_time = datetime.utcnow()
+            match.end_time = now
 
             # Notify both players
-            await send_match_notification(
-                str(match.player1_id),
-                {
-                    "status": "match_cancelled",
-                    "match_id": str(match.id),
-                    "reason": "Match expired",
-                },
-            )
-
-            await send_match_notification(
-                str(match.player2_id),
+            await broadcast_match_notification(
+                [str(match.player1_id), str(match.player2_id)],
                 {
                     "status": "match_cancelled",
-                    "match_id": str(match.id),
+                    "match_id": match.id,
                     "reason": "Match expired",
                 },
             )
 
-            db.add(match)
-            match_logger.info(f"Cancelled expired match: {match.id}")
+            match_logger.info("Cancelled expired match: %s", match.id)
 
         await db.commit()
-        match_logger.info(f"Cancelled {len(pending_matches)} expired matches")
+        match_logger.info("Cancelled %s expired matches", len(pending_matches))
     except Exception as e:
-        match_logger.error(f"Error cancelling expired matches: {str(e)}")
+        match_logger.error("Error cancelling expired matches: %s", e)
 
 
 async def capitulate_match_logic(
@@ -312,7 +456,10 @@ async def capitulate_match_logic(
     else:
         raise AuthorizationException("Loser not in this match")
 
-    await finish_match_with_winner(db, match_id, winner_id)
+    # Another request (a correct submission, the draw timeout) may have
+    # finished the match since it was read
+    if not await finish_match_with_winner(db, match_id, winner_id):
+        raise ValidationException("Match not found or not active")
 
     users = await get_users_by_ids(db, [match.player1_id, match.player2_id])
     user_map = {u.id: u for u in users}
@@ -329,34 +476,38 @@ async def capitulate_match_logic(
 
     await RatingService.update_ratings_after_match(db, winner.id, loser.id, match)
 
-    await manager.send_match_notification(
-        str(winner.id),
-        {
-            "status": "match_completed",
-            "match_id": str(match.id),
-            "message": "Congratulations! You won the match as your opponent surrendered.",
-            "problem_id": str(match.problem_id),
-            "result": "win",
-            "new_rating": winner.rating,
-            "old_rating": old_winner_rating,
-        },
-    )
-
-    await manager.send_match_notification(
-        str(loser.id),
-        {
-            "status": "match_completed",
-            "message": f"You surrendered the match. '{winner.username}' is declared the winner.",
-            "match_id": str(match.id),
-            "problem_id": str(match.problem_id),
-            "result": "loss",
-            "new_rating": loser.rating,
-            "old_rating": old_loser_rating,
-        },
+    # The match result and the rating changes are committed together
+    await RatingService.commit_ratings(db, winner.id, loser.id)
+
+    await asyncio.gather(
+        manager.send_match_notification(
+            str(winner.id),
+            {
+                "status": "match_completed",
+                "match_id": match.id,
+                "message": "Congratulations! You won the match as your opponent surrendered.",
+                "problem_id": match.problem_id,
+                "result": "win",
+                "new_rating": winner.rating,
+                "old_rating": old_winner_rating,
+            },
+        ),
+        manager.send_match_notification(
+            str(loser.id),
+            {
+                "status": "match_completed",
+                "message": f"You surrendered the match. '{winner.username}' is declared the winner.",
+                "match_id": match.id,
+                "problem_id": match.problem_id,
+                "result": "loss",
+                "new_rating": loser.rating,
+                "old_rating": old_loser_rating,
+            },
+        ),
     )
 
     submission_logger.info(
-        f"Match completed via capitulation: ID {match_id}, Winner: {winner.username}"
+        "Match completed via capitulation: ID %s, Winner: %s", match_id, winner.username
     )
 
 
@@ -365,25 +516,53 @@ async def send_accept_status(match: Match, db: AsyncSession):
     Send acceptance status to both players in a match.
     """
     # Отримуємо юзернейми
-    result1 = await db.execute(select(User).where(User.id == match.player1_id))
-    player1 = result1.scalar_one_or_none()
-    result2 = await db.execute(select(User).where(User.id == match.player2_id))
-    player2 = result2.scalar_one_or_none()
+    usernames = await get_usernames_by_ids(db, [match.player1_id, match.player2_id])
     data = {
         "status": "match_accept_status",
-        "player1_id": str(player1.id) if player1 else "",
-        "player1_username": player1.username if player1 else "",
+        "player1_id": match.player1_id if match.player1_id in usernames else "",
+        "player1_username": usernames.get(match.player1_id, ""),
         "player1_accepted": bool(match.player1_accepted),
-        "player2_id": str(player2.id) if player2 else "",
-        "player2_username": player2.username if player2 else "",
+        "player2_id": match.player2_id if match.player2_id in usernames else "",
+        "player2_username": usernames.get(match.player2_id, ""),
         "player2_accepted": bool(match.player2_accepted),
     }
-    await send_match_notification(str(match.player1_id), data)
-    await send_match_notification(str(match.player2_id), data)
+    await broadcast_match_notification(
+        [str(match.player1_id), str(match.player2_id)], data
+    )
+
+
+async def raise_acceptance_error(
+    db: AsyncSession, match_id: uuid.UUID, user_id: uuid.UUID
+) -> None:
+    """
+    Work out why an acceptance changed nothing and raise the matching error.
+    """
+    match = await get_match_for_participant(db, match_id, user_id)
+    if not match:
+        match_logger.warning(
+            "Match acceptance failed: Match not found or user not part of it: "
+            "user=%s, match=%s",
+            user_id,
+            match_id,
+        )
+        raise AuthorizationException(detail="You are not part of this match")
+    if match.status != MatchStatus.PENDING:
+        match_logger.warning(
+            "Match acceptance failed: Match not in PENDING state: %s, current state: %s",
+            match_id,
+            match.status,
+        )
+        raise ValidationException(detail="Match is not in a pending state")
+    match_logger.warning(
+        "Match acceptance failed: User %s already accepted match %s",
+        user_id,
+        match_id,
+    )
+    raise ValidationException(detail="You have already accepted this match")
 
 
 async def accept_match_service(
-    db: AsyncSession, match_id: str, user_id: str
+    db: AsyncSession, match_id: uuid.UUID, user_id: uuid.UUID
 ) -> Dict[str, Any]:
     """
     Handle the logic for accepting a match invitation.
@@ -397,64 +576,21 @@ async def accept_match_service(
         Dictionary with the result of the match acceptance
     """
     try:
-        # Convert IDs to UUID
-        try:
-            match_uuid = uuid.UUID(match_id)
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            match_logger.warning(
-                f"Match acceptance failed: Invalid ID format: user={user_id}, match={match_id}"
-            )
-            raise BadRequestException(detail="Invalid ID format")
-
-        # Check if match exists
-        match = await get_match_by_id(db, match_uuid)
+        # Accept and, if the opponent already has, activate in one statement
+        match = await accept_pending_match(db, match_id, user_id)
         if not match:
-            match_logger.warning(
-                f"Match acceptance failed: Match not found: {match_id}"
-            )
-            raise ResourceNotFoundException(detail="Match not found")
-
-        # Check if user is part of the match
-        if match.player1_id != user_uuid and match.player2_id != user_uuid:
-            match_logger.warning(
-                f"Match acceptance failed: User not part of match: user={user_id}, match={match_id}"
-            )
-            raise AuthorizationException(detail="You are not part of this match")
-
-        # Check if match is in the correct state
-        if match.status != MatchStatus.PENDING:
-            match_logger.warning(
-                f"Match acceptance failed: Match not in PENDING state: {match_id}, current state: {match.status}"
-            )
-            raise ValidationException(detail="Match is not in a pending state")
-
-        # Update acceptance status
-        if match.player1_id == user_uuid:
-            if match.player1_accepted:
-                match_logger.warning(
-                    f"Match acceptance failed: User {user_id} already accepted match {match_id}"
-                )
-                raise ValidationException(detail="You have already accepted this match")
-            match.player1_accepted = True
-        else:
-            if match.player2_accepted:
-                match_logger.warning(
-                    f"Match acceptance failed: User {user_id} already accepted match {match_id}"
-                )
-                raise ValidationException(detail="You have already accepted this match")
-            match.player2_accepted = True
-
-        # Check if both players have accepted
-        if match.player1_accepted and match.player2_accepted:
-            match.status = MatchStatus.ACTIVE
+            await raise_acceptance_error(db, match_id, user_id)
+        if match.status == MatchStatus.ACTIVE:
             match_logger.info(
-                f"Match {match_id} is now ACTIVE as both players accepted"
+                "Match %s is now ACTIVE as both players accepted", match_id
             )
+            # The draw timeout runs from the moment the match actually starts.
+            # It is set before the commit: an active match without one would
+            # never end, while a stray one for a match that stays pending is
+            # skipped when it fires
+            await schedule_draw_timeout(match.id)
 
-        db.add(match)
         await db.commit()
-        await db.refresh(match)
 
         # Send acceptance status to both players
         await send_accept_status(match, db)
@@ -462,16 +598,18 @@ async def accept_match_service(
         # Return response
         response = {
             "status": "accepted",
-            "match_id": str(match.id),
+            "match_id": match.id,
             "match_status": match.status,
             "player1_accepted": match.player1_accepted,
             "player2_accepted": match.player2_accepted,
         }
         match_logger.info(
-            f"Match acceptance completed: user={user_id}, match={match_id}"
+            "Match acceptance completed: user=%s, match=%s", user_id, match_id
         )
         return response
 
+    except (AuthorizationException, ValidationException):
+        raise
     except Exception as e:
-        match_logger.error(f"Error in accept_match_service: {str(e)}")
+        match_logger.error("Error in accept_match_service: %s", e)
         raise DatabaseException(detail=f"Failed to accept match: {str(e)}")
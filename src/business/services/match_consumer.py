@@ -4,7 +4,6 @@ import sys
 
 from src.business.services.match import process_match_queue
 from src.data.repositories.database import get_session
-from src.presentation.routes.match import match_acceptance_timeout, match_draw_timeout
 
 # Configure logging
 logging.basicConfig(
@@ -25,24 +24,26 @@ async def run_consumer():
         try:
             async for db in get_session():
                 logger.info("Processing match queue...")
-                matches = await process_match_queue(
-                    db,
-                    match_acceptance_timeout,
-                    match_draw_timeout,
-                )
-                logger.info(f"Matches created in this cycle: {len(matches)}")
+                matches = await process_match_queue(db)
+                logger.info("Matches created in this cycle: %s", len(matches))
                 for m in matches:
                     logger.info(
-                        f"Match debug: id={m.id}, problem_id={m.problem_id}, "
-                        f"player1_id={m.player1_id}, player2_id={m.player2_id}"
+                        "Match debug: id=%s, problem_id=%s, "
+                        "player1_id=%s, player2_id=%s",
+                        m.id,
+                        m.problem_id,
+                        m.player1_id,
+                        m.player2_id,
                     )
                     if not m.id or not m.problem_id:
                         logger.warning(
-                            f"Match with missing id/problem_id: id={m.id}, problem_id={m.problem_id}"
+                            "Match with missing id/problem_id: id=%s, problem_id=%s",
+                            m.id,
+                            m.problem_id,
                         )
             await asyncio.sleep(1)
         except Exception as e:
-            logger.error(f"Error in match queue consumer: {str(e)}")
+            logger.error("Error in match queue consumer: %s", e)
             await asyncio.sleep(5)
 
 
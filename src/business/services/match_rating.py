@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.data.schemas import Match
 from src.data.schemas.user import User
 from src.data.repositories.match_repository import update_user_ratings
+from src.data.repositories.redis import redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -99,13 +100,37 @@ class RatingService:
             await update_match(db, match.id, update_data)
 
         logger.info(
-            f"Updated ratings after {log_context}: "
-            f"{player1_label} {player1_id_str} ({old_player1_rating} → {new_player1_rating}), "
-            f"{player2_label} {player2_id_str} ({old_player2_rating} → {new_player2_rating})"
+            "Updated ratings after %s: "
+            "%s %s (%s → %s), "
+            "%s %s (%s → %s)",
+            log_context,
+            player1_label,
+            player1_id_str,
+            old_player1_rating,
+            new_player1_rating,
+            player2_label,
+            player2_id_str,
+            old_player2_rating,
+            new_player2_rating,
         )
 
         return new_player1_rating, new_player2_rating
 
+    @staticmethod
+    async def commit_ratings(
+            db: AsyncSession, *user_ids: Union[UUID4, str]
+    ) -> None:
+        """
+        Commit a finished match together with its rating changes, then drop
+        the players' cached profiles, which still hold the old ratings.
+        """
+        await db.commit()
+        try:
+            await redis_client.invalidate_cached_users(*user_ids)
+        except Exception as e:
+            # The cached profiles expire with their TTL anyway
+            logger.warning("Could not invalidate cached users %s: %s", user_ids, e)
+
     @staticmethod
     async def update_ratings_after_match(
             db: AsyncSession,
@@ -173,7 +198,9 @@ class RatingService:
 
         if not player1 or not player2:
             logger.error(
-                f"Failed to update ratings: User not found (player1_id={player1_id}, player2_id={player2_id})"
+                "Failed to update ratings: User not found (player1_id=%s, player2_id=%s)",
+                player1_id,
+                player2_id,
             )
             return None, None, player1_id_str, player2_id_str
 
@@ -0,0 +1,163 @@
+import asyncio
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.business.services.match import (
+    ACCEPT_DEADLINES_KEY,
+    DRAW_DEADLINES_KEY,
+    broadcast_match_notification,
+    send_match_notification,
+)
+from src.config import logger
+from src.data.repositories import (
+    DB_UTC_NOW,
+    async_session_factory,
+    get_match_with_players,
+    transition_match,
+)
+from src.data.repositories.redis import redis_client
+from src.data.schemas import MatchStatus
+
+# Create a module-specific logger
+timer_logger = logger.getChild("match_timers")
+
+# Delay before a timeout whose handler failed is tried again
+TIMER_RETRY_DELAY_SECONDS = 10
+
+
+async def cancel_unaccepted_match(db: AsyncSession, match_id: str) -> None:
+    """
+    Cancel a match that is still pending after the acceptance window.
+    """
+    row = await get_match_with_players(db, uuid.UUID(match_id))
+    match, player1_name, player2_name = row or (None, None, None)
+    if match and match.status == MatchStatus.PENDING:
+        # Determine who did not accept
+        not_accepted = []
+        if not match.player1_accepted:
+            not_accepted.append(str(match.player1_id))
+        if not match.player2_accepted:
+            not_accepted.append(str(match.player2_id))
+        # Skip the timeout if the match was accepted or declined meanwhile
+        if not await transition_match(
+            db,
+            match.id,
+            MatchStatus.PENDING,
+            status=MatchStatus.CANCELLED,
+            end_time=DB_UTC_NOW,
+        ):
+            return
+        await db.commit()
+        players = [
+            (match.player1_id, player1_name, match.player1_accepted, player2_name),
+            (match.player2_id, player2_name, match.player2_accepted, player1_name),
+        ]
+        # The reasons differ per player, so publish both at once
+        await asyncio.gather(
+            *(
+                send_match_notification(
+                    str(user_id),
+                    {
+                        "status": "match_cancelled",
+                        "match_id": match.id,
+                        "reason": (
+                            f"User '{other_name}' did not accept in time"
+                            if other_name is not None and not accepted
+                            else "You did not accept in time"
+                        ),
+                    },
+                )
+                for user_id, name, accepted, other_name in players
+                if name is not None
+            )
+        )
+
+
+async def finish_match_as_draw(db: AsyncSession, match_id: str) -> None:
+    """
+    End a match that is still active after its time has run out as a draw.
+    """
+    row = await get_match_with_players(db, uuid.UUID(match_id))
+    match, player1_name, player2_name = row or (None, None, None)
+    if match and match.status == MatchStatus.ACTIVE:
+        # Skip the timeout if the match was won or surrendered meanwhile
+        if not await transition_match(
+            db,
+            match.id,
+            MatchStatus.ACTIVE,
+            status=MatchStatus.COMPLETED,
+            end_time=DB_UTC_NOW,
+        ):
+            return
+        await db.commit()
+        await broadcast_match_notification(
+            [
+                str(user_id)
+                for user_id, name in (
+                    (match.player1_id, player1_name),
+                    (match.player2_id, player2_name),
+                )
+                if name is not None
+            ],
+            {
+                "status": "match_draw",
+                "match_id": match.id,
+                "message": "Match ended in a draw. No one submitted a correct solution in 45 minutes.",
+            },
+        )
+
+
+TIMER_HANDLERS = (
+    (ACCEPT_DEADLINES_KEY, cancel_unaccepted_match),
+    (DRAW_DEADLINES_KEY, finish_match_as_draw),
+)
+
+
+async def fire_due_timers() -> None:
+    """
+    Run the handler of every match timeout whose deadline has passed.
+    """
+    now = time.time()
+    for key, handler in TIMER_HANDLERS:
+        for match_id in await redis_client.zrangebyscore(key, 0, now):
+            # ZREM doubles as a claim, so each timeout fires in one worker only
+            if not await redis_client.zrem(key, match_id):
+                continue
+            try:
+                async with async_session_factory() as db:
+                    await handler(db, match_id)
+            except Exception as e:
+                timer_logger.error(
+                    "Error handling %s timeout for match %s: %s", key, match_id, e
+                )
+                # Nothing else ends the match, so the timeout must not be lost
+                await reschedule_timer(key, match_id)
+
+
+async def reschedule_timer(key: str, match_id: str) -> None:
+    """
+    Put a claimed timeout back into its set to fire again after a delay.
+    """
+    try:
+        await redis_client.zadd(
+            key, {match_id: time.time() + TIMER_RETRY_DELAY_SECONDS}
+        )
+    except Exception as e:
+        timer_logger.error(
+            "Could not reschedule %s timeout for match %s: %s", key, match_id, e
+        )
+
+
+async def run_match_timers(poll_interval: float = 1.0) -> None:
+    """
+    Poll the match deadline sets until cancelled.
+    """
+    timer_logger.info("Starting match timers")
+    while True:
+        try:
+            await fire_due_timers()
+        except Exception as e:
+            timer_logger.error("Error polling match timers: %s", e)
+        await asyncio.sleep(poll_interval)
@@ -1,9 +1,11 @@
+import hashlib
+
 from pydantic import UUID4
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import logger
 from src.data.repositories.profile import get_user_match_history, get_user_contribution_calendar, \
-    get_user_rating_history, get_user_topic_stats
+    get_user_rating_history, get_user_topic_stats, get_user_match_history_version
 from src.data.schemas import MatchHistoryEntry, ContributionCalendar, RatingHistory, MatchHistory, TopicStats
 from src.errors import DatabaseException, BadRequestException
 
@@ -27,19 +29,50 @@ async def get_user_match_history_service(
         Match history data including entries and total count
     """
     try:
-        profile_logger.info(f"Getting match history for user {user_id}")
+        profile_logger.info("Getting match history for user %s", user_id)
         match_history_entries, total_count = await get_user_match_history(db, user_id, limit, offset)
         profile_logger.info(
-            f"Retrieved {len(match_history_entries)} match history entries for user {user_id} (total: {total_count})"
+            "Retrieved %s match history entries for user %s (total: %s)",
+            len(match_history_entries),
+            user_id,
+            total_count,
         )
         return MatchHistory(entries=match_history_entries, total=total_count)
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving match history for user {user_id}: {str(e)}"
+            "Error retrieving match history for user %s: %s", user_id, e
         )
         raise DatabaseException(detail="Failed to retrieve match history")
 
 
+async def get_user_match_history_etag_service(
+        db: AsyncSession, user_id: UUID4, limit: int = 10, offset: int = 0
+) -> str:
+    """
+    Build an ETag for one page of a user's match history.
+
+    The tag changes when a match finishes or gets its ratings recorded, or
+    when an opponent's username or rating changes, so it can be checked with
+    a single aggregate query.
+
+    Args:
+        db: Database session
+        user_id: ID of the user to get match history for
+        limit: Maximum number of matches to return
+        offset: Number of matches to skip
+
+    Returns:
+        Quoted ETag value
+    """
+    total, last_finished_at, rated, opponents = await get_user_match_history_version(
+        db, user_id
+    )
+    version = (
+        f"{user_id}:{total}:{last_finished_at}:{rated}:{opponents}:{limit}:{offset}"
+    )
+    return f'"{hashlib.md5(version.encode()).hexdigest()}"'
+
+
 async def get_user_contribution_calendar_service(
         db: AsyncSession, user_id: UUID4, year: int
 ) -> ContributionCalendar:
@@ -55,20 +88,31 @@ async def get_user_contribution_calendar_service(
         Contribution calendar data
     """
     try:
-        profile_logger.info(f"Getting contribution calendar for user {user_id} for year {year}")
+        profile_logger.info(
+            "Getting contribution calendar for user %s for year %s", user_id, year
+        )
         contribution_calendar = await get_user_contribution_calendar(db, user_id, year)
         profile_logger.info(
-            f"Retrieved contribution calendar for user {user_id} for year {year} with {len(contribution_calendar.entries)} entries"
+            "Retrieved contribution calendar for user %s for year %s with %s entries",
+            user_id,
+            year,
+            len(contribution_calendar.entries),
         )
         return contribution_calendar
     except BadRequestException as e:
         profile_logger.warning(
-            f"Bad request when retrieving contribution calendar for user {user_id} for year {year}: {str(e)}"
+            "Bad request when retrieving contribution calendar for user %s for year %s: %s",
+            user_id,
+            year,
+            e,
         )
         raise e
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving contribution calendar for user {user_id} for year {year}: {str(e)}"
+            "Error retrieving contribution calendar for user %s for year %s: %s",
+            user_id,
+            year,
+            e,
         )
         raise DatabaseException(detail="Failed to retrieve contribution calendar")
 
@@ -87,20 +131,22 @@ async def get_user_rating_history_service(
         Rating history data
     """
     try:
-        profile_logger.info(f"Getting rating history for user {user_id}")
+        profile_logger.info("Getting rating history for user %s", user_id)
         rating_history = await get_user_rating_history(db, user_id)
         profile_logger.info(
-            f"Retrieved rating history for user {user_id} with {len(rating_history.history)} entries"
+            "Retrieved rating history for user %s with %s entries",
+            user_id,
+            len(rating_history.history),
         )
         return rating_history
     except BadRequestException as e:
         profile_logger.warning(
-            f"Bad request when retrieving rating history for user {user_id}: {str(e)}"
+            "Bad request when retrieving rating history for user %s: %s", user_id, e
         )
         raise e
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving rating history for user {user_id}: {str(e)}"
+            "Error retrieving rating history for user %s: %s", user_id, e
         )
         raise DatabaseException(detail="Failed to retrieve rating history")
 
@@ -120,19 +166,21 @@ async def get_user_topic_stats_service(
         Topic statistics data
     """
     try:
-        profile_logger.info(f"Getting topic statistics for user {user_id}")
+        profile_logger.info("Getting topic statistics for user %s", user_id)
         topic_stats = await get_user_topic_stats(db, user_id, limit)
         profile_logger.info(
-            f"Retrieved {len(topic_stats.topics)} topic statistics for user {user_id}"
+            "Retrieved %s topic statistics for user %s",
+            len(topic_stats.topics),
+            user_id,
         )
         return topic_stats
     except BadRequestException as e:
         profile_logger.warning(
-            f"Bad request when retrieving topic statistics for user {user_id}: {str(e)}"
+            "Bad request when retrieving topic statistics for user %s: %s", user_id, e
         )
         raise e
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving topic statistics for user {user_id}: {str(e)}"
+            "Error retrieving topic statistics for user %s: %s", user_id, e
         )
         raise DatabaseException(detail="Failed to retrieve topic statistics")
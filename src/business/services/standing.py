@@ -24,7 +24,7 @@ async def get_standing_service(
         StandingResponse object containing users and total count
     """
     try:
-        standing_logger.info(f"Getting standing with limit={limit}, offset={offset}")
+        standing_logger.info("Getting standing with limit=%s, offset=%s", limit, offset)
         users, total = await get_standing(db, limit, offset)
 
         # Convert users to StandingEntry objects
@@ -38,8 +38,8 @@ async def get_standing_service(
             for user in users
         ]
 
-        standing_logger.info(f"Retrieved {len(standing_entries)} users for standing")
+        standing_logger.info("Retrieved %s users for standing", len(standing_entries))
         return StandingResponse(users=standing_entries, total=total)
     except Exception as e:
-        standing_logger.error(f"Error retrieving standing: {str(e)}")
+        standing_logger.error("Error retrieving standing: %s", e)
         raise DatabaseException(detail="Failed to retrieve standing")
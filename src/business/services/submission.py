@@ -1,10 +1,11 @@
+import asyncio
 import uuid
-from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.business.services.match_rating import RatingService
 from src.config import logger
+from src.data.repositories.match_repository import finish_match_with_winner
 from src.data.repositories.submission import (
     check_solution,
     fetch_test_cases,
@@ -27,8 +28,8 @@ submission_logger = logger.getChild("submission")
 class SubmissionService:
     @staticmethod
     async def process_submission(
-            user_id: str,
-            match_id: str,
+            user_id: uuid.UUID,
+            match_id: uuid.UUID,
             code: str,
             language: str,
             db: AsyncSession,
@@ -47,27 +48,23 @@ class SubmissionService:
             A dictionary with the result of the submission
         """
         submission_logger.info(
-            f"Solution submission: Match ID {match_id}, User ID {user_id}, Language: {language}"
+            "Solution submission: Match ID %s, User ID %s, Language: %s",
+            match_id,
+            user_id,
+            language,
         )
 
         try:
-            try:
-                user_uuid = uuid.UUID(user_id)
-                match_uuid = uuid.UUID(match_id)
-            except ValueError:
-                submission_logger.warning(
-                    f"Solution submission failed: Invalid user ID format: {user_id}"
-                )
-                raise ResourceNotFoundException(detail="User not found")
-
             # Get the match
-            match = await get_match_by_id(db, match_uuid)
+            match = await get_match_by_id(db, match_id)
 
             # Check if the user is part of the match
-            if match.player1_id != user_uuid and match.player2_id != user_uuid:
+            if match.player1_id != user_id and match.player2_id != user_id:
                 submission_logger.warning(
-                    f"Solution submission failed: User not in match: User ID {user_uuid}, "
-                    f"Match ID {match_id}"
+                    "Solution submission failed: User not in match: User ID %s, "
+                    "Match ID %s",
+                    user_id,
+                    match_id,
                 )
                 raise AuthorizationException(
                     detail="Not authorized to submit solution for this match"
@@ -76,15 +73,18 @@ class SubmissionService:
             # Check if the match is active
             if match.status != MatchStatus.ACTIVE:
                 submission_logger.warning(
-                    f"Solution submission failed: Match not active: ID {match_id}, "
-                    f"Status {match.status}"
+                    "Solution submission failed: Match not active: ID %s, "
+                    "Status %s",
+                    match_id,
+                    match.status,
                 )
                 raise BadRequestException(detail="Match is not active")
 
             # Get the problem associated with the match
             if not match.problem_id:
                 submission_logger.warning(
-                    f"Solution submission failed: No problem associated with match: ID {match_id}"
+                    "Solution submission failed: No problem associated with match: ID %s",
+                    match_id,
                 )
                 raise BadRequestException(
                     detail="No problem associated with this match"
@@ -92,11 +92,12 @@ class SubmissionService:
 
             problem = await get_problem_by_id(db, match.problem_id)
 
-            # Fetch test cases from Digital Ocean
-            test_cases = fetch_test_cases(str(problem.id))
+            # Fetch test cases from Digital Ocean (blocking boto3 calls, keep them off the event loop)
+            test_cases = await asyncio.to_thread(fetch_test_cases, str(problem.id))
             if not test_cases:
                 submission_logger.warning(
-                    f"Solution submission failed: No test cases found for problem: ID {match.problem_id}"
+                    "Solution submission failed: No test cases found for problem: ID %s",
+                    match.problem_id,
                 )
                 raise BadRequestException(detail="No test cases found for this problem")
 
@@ -105,19 +106,20 @@ class SubmissionService:
 
             # If a solution is correct, end the match and update ratings
             if is_correct:
-                match.status = MatchStatus.COMPLETED
-                match.winner_id = user_uuid
-                match.end_time = datetime.now()
+                # Only the first correct solution may finish the match
+                if not await finish_match_with_winner(db, match.id, user_id):
+                    submission_logger.warning(
+                        "Match already finished before submission: ID %s", match_id
+                    )
+                    raise BadRequestException(detail="Match is not active")
 
                 # Get both players
-                users = await get_users_by_ids(
-                    db, [str(match.player1_id), str(match.player2_id)]
-                )
+                users = await get_users_by_ids(db, [match.player1_id, match.player2_id])
                 user_map = {u.id: u for u in users}
-                winner = user_map.get(user_uuid)
+                winner = user_map.get(user_id)
                 loser = user_map.get(
                     match.player2_id
-                    if match.player1_id == user_uuid
+                    if match.player1_id == user_id
                     else match.player1_id
                 )
 
@@ -130,40 +132,46 @@ class SubmissionService:
 
                 await RatingService.update_ratings_after_match(db, winner.id, loser.id, match)
 
-                await db.commit()
+                # The match result and the rating changes are committed together
+                await RatingService.commit_ratings(db, winner.id, loser.id)
 
                 submission_logger.info(
-                    f"Ratings updated: Winner {winner.username} ({winner.rating}), "
-                    f"Loser {loser.username} ({loser.rating})"
+                    "Ratings updated: Winner %s (%s), "
+                    "Loser %s (%s)",
+                    winner.username,
+                    winner.rating,
+                    loser.username,
+                    loser.rating,
                 )
 
                 # Send match completion notification to both players
                 winner_notification = {
                     "status": "match_completed",
                     "message": "Congratulations! You solved the problem correctly and won the match.",
-                    "match_id": str(match.id),
-                    "problem_id": str(match.problem_id),
+                    "match_id": match.id,
+                    "problem_id": match.problem_id,
                     "result": "win",
                     "new_rating": winner.rating,
                     "old_rating": old_winner_rating,
                 }
-                await manager.send_match_notification(
-                    str(winner.id), winner_notification
-                )
-
                 loser_notification = {
                     "status": "match_completed",
                     "message": f"Your opponent '{winner.username}' solved the problem and won the match.",
-                    "match_id": str(match.id),
-                    "problem_id": str(match.problem_id),
+                    "match_id": match.id,
+                    "problem_id": match.problem_id,
                     "result": "loss",
                     "new_rating": loser.rating,
                     "old_rating": old_loser_rating,
                 }
-                await manager.send_match_notification(str(loser.id), loser_notification)
+                await asyncio.gather(
+                    manager.send_match_notification(
+                        str(winner.id), winner_notification
+                    ),
+                    manager.send_match_notification(str(loser.id), loser_notification),
+                )
 
                 submission_logger.info(
-                    f"Match completed: ID {match_id}, Winner: {user_uuid}"
+                    "Match completed: ID %s, Winner: %s", match_id, user_id
                 )
                 return {
                     "is_correct": True,
@@ -172,17 +180,19 @@ class SubmissionService:
             else:
                 # Notify user about an incorrect solution
                 await manager.send_match_notification(
-                    user_id,
+                    str(user_id),
                     {
                         "status": "submission_result",
                         "is_correct": False,
                         "message": "Incorrect solution. Try again!",
                         "match_id": match_id,
-                        "problem_id": str(match.problem_id),
+                        "problem_id": match.problem_id,
                     },
                 )
                 submission_logger.info(
-                    f"Incorrect solution submitted: Match ID {match_id}, User ID {user_uuid}"
+                    "Incorrect solution submitted: Match ID %s, User ID %s",
+                    match_id,
+                    user_id,
                 )
                 return {
                     "is_correct": False,
@@ -192,5 +202,5 @@ class SubmissionService:
         except (ResourceNotFoundException, AuthorizationException, BadRequestException):
             raise
         except Exception as e:
-            submission_logger.error(f"Unexpected error during submission: {str(e)}")
+            submission_logger.error("Unexpected error during submission: %s", e)
             raise
@@ -27,10 +27,32 @@ class Settings(BaseSettings):
     ALGO_RUMBLE_PORT: int
     ALGO_RUMBLE_HOST_PROD: str
 
+    # Main DB connection pool
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Ping each connection on checkout; costs a round trip per request, so only
+    # worth it when something between the app and Postgres drops idle connections
+    DB_POOL_PRE_PING: bool = False
+    DB_QUERY_CACHE_SIZE: int = 1200
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
     # Redis
     REDIS_HOST_PROD: str
     REDIS_PORT: int
     REDIS_PASSWORD: str
+    # Includes the connection the pub/sub listener holds for its lifetime
+    REDIS_MAX_CONNECTIONS: int = 64
+    # How long a command waits for a free pooled connection before failing
+    REDIS_POOL_TIMEOUT_SECONDS: int = 5
+    USER_CACHE_TTL_SECONDS: int = 30
+    PROBLEM_CACHE_TTL_SECONDS: int = 300
+
+    # Take the client IP from X-Forwarded-For; only safe behind a proxy that sets it
+    TRUST_PROXY_HEADERS: bool = False
+    # Proxies in front of the app that append to X-Forwarded-For; the client
+    # IP is the entry this many hops from the right
+    TRUSTED_PROXY_COUNT: int = 1
 
     # Kafka
     KAFKA_HOST: str
@@ -48,6 +70,11 @@ class Settings(BaseSettings):
     AWS_ENDPOINT_URL: str
     AWS_BUCKET_NAME: str
     AWS_REGION: str
+    # S3 requests in flight at once when moving a problem's testcases;
+    # throughput levels off around 16
+    S3_MAX_CONCURRENCY: int = 16
+    # How long presigned testcase upload URLs and their upload session stay valid
+    TESTCASE_UPLOAD_URL_TTL_SECONDS: int = 900
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
@@ -55,6 +82,9 @@ class Settings(BaseSettings):
     MATCH_ACCEPT_TIMEOUT_SECONDS: int
     MATCH_DURATION_SECONDS: int
 
+    # Upper bound on open notification WebSockets per worker
+    WS_MAX_CONNECTIONS: int = 10_000
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -1,8 +1,16 @@
-from .database import get_session, init_db
+from .database import DbSession, async_session_factory, get_session, init_db
 from .match_repository import (
+    DB_UTC_NOW,
+    accept_pending_match,
     create_match,
     finish_match_with_winner,
     get_match_by_id,
+    get_match_for_participant,
+    get_match_with_players,
+    get_open_match_for_user,
+    get_open_match_with_opponent,
+    get_rating_if_free,
+    transition_match,
     update_match,
 )
 from .problem import (
@@ -15,21 +23,40 @@ from .problem import (
 from .profile import get_user_match_history
 from .redis import RedisClient, redis_client
 from .redis_dependency import get_redis_client
-from .s3 import get_s3_client, upload_problem_to_s3, upload_testcase_to_s3
-from .user_repository import get_user_by_id, get_users_by_ids
+from .s3 import (
+    find_missing_testcases,
+    get_s3_client,
+    presign_testcase_upload,
+    upload_problem_to_s3,
+    upload_testcase_to_s3,
+)
+from .user_repository import get_user_by_id, get_usernames_by_ids, get_users_by_ids
 
 __all__ = [
+    "DB_UTC_NOW",
+    "accept_pending_match",
     "get_session",
+    "DbSession",
+    "async_session_factory",
     "init_db",
     "RedisClient",
     "redis_client",
     "get_redis_client",
     "get_s3_client",
+    "presign_testcase_upload",
+    "find_missing_testcases",
     "upload_problem_to_s3",
     "upload_testcase_to_s3",
     "get_user_by_id",
     "get_users_by_ids",
+    "get_usernames_by_ids",
     "get_match_by_id",
+    "get_match_for_participant",
+    "get_match_with_players",
+    "get_open_match_with_opponent",
+    "get_rating_if_free",
+    "get_open_match_for_user",
+    "transition_match",
     "create_match",
     "update_match",
     "finish_match_with_winner",
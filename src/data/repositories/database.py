@@ -1,4 +1,6 @@
-from typing import AsyncGenerator
+from typing import Annotated, AsyncGenerator
+
+from fastapi import Depends
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel
@@ -6,7 +8,35 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.config import Config
 
-async_engine = create_async_engine(url=Config.ALGO_RUMBLE_DB_URL)
+
+def _connect_args() -> dict:
+    """
+    Driver-level connection arguments.
+
+    asyncpg keeps a per-connection prepared statement cache, so repeated
+    queries with the same shape skip the server-side PREPARE step.
+    """
+    if "asyncpg" not in Config.POSTGRES_DRIVER:
+        return {}
+    return {
+        "prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+async_engine = create_async_engine(
+    url=Config.ALGO_RUMBLE_DB_URL,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    pool_recycle=Config.DB_POOL_RECYCLE_SECONDS,
+    query_cache_size=Config.DB_QUERY_CACHE_SIZE,
+    echo=False,
+    connect_args=_connect_args(),
+)
+
+# Shared factory for request sessions and for work that outlives a request
+async_session_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
 
 
 async def init_db() -> None:
@@ -21,6 +51,8 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency to get an async session for the algo_rumble database.
     """
-    async_session = async_sessionmaker(bind=async_engine, expire_on_commit=False)
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session
+
+
+DbSession = Annotated[AsyncSession, Depends(get_session)]
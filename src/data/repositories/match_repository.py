@@ -1,24 +1,194 @@
 from datetime import datetime
+from typing import Optional, Tuple
 from uuid import UUID
 
 from pydantic import UUID4
-from sqlalchemy import select, update
+from sqlalchemy import (
+    and_,
+    bindparam,
+    case,
+    exists,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    union_all,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from src.data.schemas import Match, MatchStatus, Problem, User
+from src.data.schemas import OPEN_MATCH_STATUS_SQL, Match, MatchStatus, Problem, User
 from src.errors import ResourceNotFoundException
 
+# Current time as naive UTC, taken by the database: match timestamps are
+# TIMESTAMP WITHOUT TIME ZONE, which NOW() alone would fill in the server's zone
+DB_UTC_NOW = func.timezone("UTC", func.now())
+
+# The read queries on the request paths are built once at import time and
+# executed with bound parameters, so each call skips constructing the statement
+# and hashing its structure to find the compiled form in the cache
+_MATCH_FOR_PARTICIPANT = select(Match).where(
+    Match.id == bindparam("match_id"),
+    (Match.player1_id == bindparam("user_id"))
+    | (Match.player2_id == bindparam("user_id")),
+)
+
+# One branch per player column so each probes its own partial index,
+# instead of an OR across both columns
+_OPEN_MATCH_FOR_USER = select(Match).from_statement(
+    union_all(
+        select(Match).where(
+            Match.player1_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+        select(Match).where(
+            Match.player2_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+    ).limit(1)
+)
+
+_RATING_IF_FREE = select(
+    User.rating,
+    or_(
+        exists().where(
+            Match.player1_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+        exists().where(
+            Match.player2_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+    ),
+).where(User.id == bindparam("user_id"))
+
+# Same per-column branches, each also naming the opponent so it can be
+# joined in the same round trip
+_open_match = (
+    union_all(
+        select(Match.id, Match.player2_id.label("opponent_id")).where(
+            Match.player1_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+        select(Match.id, Match.player1_id.label("opponent_id")).where(
+            Match.player2_id == bindparam("user_id"), text(OPEN_MATCH_STATUS_SQL)
+        ),
+    )
+    .limit(1)
+    .subquery()
+)
+_OPEN_MATCH_WITH_OPPONENT = (
+    select(Match, User.username, User.rating)
+    .join(_open_match, Match.id == _open_match.c.id)
+    .outerjoin(User, User.id == _open_match.c.opponent_id)
+)
+
+_player1 = aliased(User)
+_player2 = aliased(User)
+_MATCH_WITH_PLAYERS = (
+    select(Match, _player1.username, _player2.username)
+    .outerjoin(_player1, Match.player1_id == _player1.id)
+    .outerjoin(_player2, Match.player2_id == _player2.id)
+    .where(Match.id == bindparam("match_id"))
+)
+
 
 async def get_match_by_id(db: AsyncSession, match_id: UUID4 | UUID | str) -> Match:
     """Get a match by ID from the database."""
-    match_id_str = str(match_id)  # Convert to string for consistency
-    result = await db.execute(select(Match).where(Match.id == match_id_str))
-    match = result.scalar_one_or_none()
+    if not isinstance(match_id, UUID):
+        match_id = UUID(match_id)
+    match = await db.get(Match, match_id)
     if not match:
         raise ResourceNotFoundException(detail="Match not found")
     return match
 
 
+async def get_match_for_participant(
+    db: AsyncSession, match_id: UUID4 | UUID, user_id: UUID4 | UUID
+) -> Match | None:
+    """Get a match by ID only if the user plays in it, in a single query."""
+    return await db.scalar(
+        _MATCH_FOR_PARTICIPANT, {"match_id": match_id, "user_id": user_id}
+    )
+
+
+async def accept_pending_match(
+    db: AsyncSession, match_id: UUID4 | UUID, user_id: UUID4 | UUID
+) -> Match | None:
+    """
+    Record a player's acceptance in one UPDATE ... RETURNING, activating the
+    match when the other player has already accepted.
+
+    Returns None, changing nothing, unless the match is pending, the user
+    plays in it and has not accepted yet. The caller commits.
+    """
+    is_player1 = Match.player1_id == user_id
+    is_player2 = Match.player2_id == user_id
+    # SET expressions see the row as it was before the update
+    player1_accepted = or_(Match.player1_accepted, is_player1)
+    player2_accepted = or_(Match.player2_accepted, is_player2)
+    return await db.scalar(
+        update(Match)
+        .where(
+            Match.id == match_id,
+            Match.status == MatchStatus.PENDING,
+            or_(
+                and_(is_player1, Match.player1_accepted.is_(False)),
+                and_(is_player2, Match.player2_accepted.is_(False)),
+            ),
+        )
+        .values(
+            player1_accepted=player1_accepted,
+            player2_accepted=player2_accepted,
+            status=case(
+                (
+                    and_(player1_accepted, player2_accepted),
+                    literal(MatchStatus.ACTIVE, Match.status.type),
+                ),
+                else_=Match.status,
+            ),
+        )
+        .returning(Match)
+    )
+
+
+async def get_open_match_for_user(
+    db: AsyncSession, user_id: UUID4 | UUID
+) -> Match | None:
+    """Get a created, pending or active match the user plays in."""
+    return await db.scalar(_OPEN_MATCH_FOR_USER, {"user_id": user_id})
+
+
+async def get_rating_if_free(
+    db: AsyncSession, user_id: UUID4 | UUID
+) -> Optional[Tuple[int, bool]]:
+    """
+    Get the user's rating and whether they already have an open match, in a
+    single query. Returns None if the user does not exist.
+    """
+    result = await db.execute(_RATING_IF_FREE, {"user_id": user_id})
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def get_open_match_with_opponent(
+    db: AsyncSession, user_id: UUID4 | UUID
+) -> Optional[Tuple[Match, Optional[str], Optional[int]]]:
+    """
+    Get the user's open match together with the opponent's username and
+    rating in a single query.
+    """
+    result = await db.execute(_OPEN_MATCH_WITH_OPPONENT, {"user_id": user_id})
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def get_match_with_players(
+    db: AsyncSession, match_id: UUID4 | UUID
+) -> Optional[Tuple[Match, Optional[str], Optional[str]]]:
+    """Get a match together with both players' usernames in a single query."""
+    result = await db.execute(_MATCH_WITH_PLAYERS, {"match_id": match_id})
+    row = result.first()
+    return tuple(row) if row else None
+
+
 async def create_match(db: AsyncSession, match: Match) -> Match:
     """Create a new match in the database."""
     db.add(match)
@@ -28,32 +198,48 @@ async def create_match(db: AsyncSession, match: Match) -> Match:
 
 
 async def update_match(db: AsyncSession, match_id: UUID4, update_data: dict) -> Match:
-    """Update a match in the database."""
+    """Update a match in the database. The caller commits."""
     match = await get_match_by_id(db, match_id)
     for key, value in update_data.items():
         if value is not None:
             setattr(match, key, value)
-    await db.commit()
+    await db.flush()
     await db.refresh(match)
     return match
 
 
+async def transition_match(
+    db: AsyncSession, match_id: UUID4 | UUID, from_status: MatchStatus, **values
+) -> Match | None:
+    """
+    Update a match only if it is still in from_status (compare-and-set).
+
+    Returns the updated match, or None when another request or worker has
+    already moved it to a different status. The caller commits.
+    """
+    return await db.scalar(
+        update(Match)
+        .where(Match.id == match_id, Match.status == from_status)
+        .values(**values)
+        .returning(Match)
+    )
+
+
 async def finish_match_with_winner(
     db: AsyncSession, match_id: UUID4, winner_id: UUID4
-) -> Match:
-    """Finish a match with a winner."""
-    match = await get_match_by_id(db, match_id)
-    await db.execute(
-        update(Match)
-        .where(Match.id == match_id)
-        .values(
-            status=MatchStatus.COMPLETED,
-            winner_id=winner_id,
-            end_time=datetime.utcnow(),
-        )
+) -> Match | None:
+    """
+    Finish an active match with a winner; None if it was no longer active.
+    The caller commits, together with the rating changes.
+    """
+    return await transition_match(
+        db,
+        match_id,
+        MatchStatus.ACTIVE,
+        status=MatchStatus.COMPLETED,
+        winner_id=winner_id,
+        end_time=DB_UTC_NOW,
     )
-    await db.commit()
-    return match
 
 
 async def select_problem_for_match(
@@ -138,7 +324,7 @@ async def select_problem_for_match(
     except Exception as e:
         # Log the error
         from src.config import logger
-        logger.error(f"Error selecting problem for match: {str(e)}")
+        logger.error("Error selecting problem for match: %s", e)
 
         # Fallback: try to get any problem
         try:
@@ -167,19 +353,17 @@ async def get_expired_pending_matches(
 
 async def get_user_by_id(db: AsyncSession, user_id: UUID4) -> User | None:
     """Get a user by ID from the database."""
-    result = await db.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    return await db.get(User, user_id)
 
 
 async def get_active_or_pending_match(db: AsyncSession, user_id: str) -> Match | None:
     """Get active or pending match for a user."""
-    result = await db.execute(
+    return await db.scalar(
         select(Match).where(
             (Match.player1_id == user_id) | (Match.player2_id == user_id),
             Match.status.in_([MatchStatus.ACTIVE, MatchStatus.PENDING]),
         )
     )
-    return result.scalar_one_or_none()
 
 
 async def get_match_history(
@@ -202,17 +386,16 @@ async def update_user_ratings(
     user1_rating: int,
     user2_rating: int,
 ) -> None:
-    """Update ratings for two users in the database."""
-    await db.execute(
-        update(User)
-        .where(User.id == user1_id)
-        .values(rating=user1_rating)
-        .execution_options(synchronize_session="fetch")
-    )
-    await db.execute(
+    """
+    Update ratings for two users in the database with a single statement.
+    The caller commits and then invalidates the users' cached profiles.
+    """
+    result = await db.execute(
         update(User)
-        .where(User.id == user2_id)
-        .values(rating=user2_rating)
-        .execution_options(synchronize_session="fetch")
+        .where(User.id.in_([user1_id, user2_id]))
+        .values(rating=case((User.id == user1_id, user1_rating), else_=user2_rating))
+        # RETURNING the rows refreshes users already loaded in the session; the
+        # CASE can't be evaluated in Python, so they would otherwise be expired
+        .returning(User)
     )
-    await db.commit()
+    result.scalars().all()
@@ -1,12 +1,32 @@
+import asyncio
 import json
 import uuid
 from typing import List, Dict, Any
 from sqlalchemy import select, delete, update
+from redis.exceptions import LockError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.config import logger
-from src.data.repositories.s3 import upload_testcase_to_s3
-from src.data.schemas.testcase import TestCaseResponse
-from src.errors import DatabaseException, ResourceNotFoundException
+from src.config import Config, logger
+from src.data.repositories.redis import redis_client
+from src.data.repositories.s3 import (
+    TESTCASE_STAGING_PREFIX,
+    TESTCASE_UPLOAD_HEADERS,
+    delete_stale_testcases,
+    find_missing_testcases,
+    presign_testcase_upload,
+    publish_staged_testcases,
+    upload_testcase_to_s3,
+)
+from src.data.schemas.testcase import (
+    TestCaseResponse,
+    TestCaseUploadSessionResponse,
+    TestCaseUploadUrls,
+)
+from src.errors import (
+    BadRequestException,
+    DatabaseException,
+    ResourceNotFoundException,
+    ValidationException,
+)
 from fastapi import HTTPException
 from src.data.schemas import Problem, ProblemCreate, ProblemResponse
 from datetime import datetime
@@ -14,6 +34,12 @@ from src.data.repositories.s3 import upload_problem_to_s3
 
 problem_logger = logger.getChild("problem_repository")
 
+TESTCASE_UPLOAD_SESSION_KEY = "testcase_upload:{}"
+# Одночасно публікується лише одна сесія завантаження для проблеми
+TESTCASE_COMMIT_LOCK_KEY = "testcase_commit:{}"
+TESTCASE_COMMIT_LOCK_TIMEOUT_SECONDS = 300
+TESTCASE_COMMIT_LOCK_WAIT_SECONDS = 30
+
 
 async def create_problem_in_db(db: AsyncSession, problem: ProblemCreate):
     try:
@@ -46,7 +72,7 @@ async def create_problem_in_db(db: AsyncSession, problem: ProblemCreate):
         await upload_problem_to_s3(str(new_problem.id), problem_data)
         return new_problem
     except Exception as e:
-        problem_logger.error(f"Error in create_problem_in_db: {str(e)}", exc_info=True)
+        problem_logger.error("Error in create_problem_in_db: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail={
@@ -66,16 +92,38 @@ async def create_testcases_in_db(
         if not problem:
             raise ResourceNotFoundException(detail=f"Проблему {problem_id} не знайдено")
 
-        testcase_ids = []
-        for idx, tc in enumerate(testcases, 1):
-            testcase_id = uuid.uuid4()
-            input_data = tc["input"]
-            output_data = tc["output"]
-            await upload_testcase_to_s3(str(problem_id), idx, input_data, output_data)
-            testcase_ids.append(testcase_id)
+        # Upload all testcases concurrently, a bounded number at a time
+        semaphore = asyncio.Semaphore(Config.S3_MAX_CONCURRENCY)
+
+        async def upload(idx: int, tc: Dict[str, str]) -> None:
+            async with semaphore:
+                await upload_testcase_to_s3(
+                    str(problem_id), idx, tc["input"], tc["output"]
+                )
+
+        results = await asyncio.gather(
+            *(upload(idx, tc) for idx, tc in enumerate(testcases, 1)),
+            return_exceptions=True,
+        )
+        failures = [
+            (idx, result)
+            for idx, result in enumerate(results, 1)
+            if isinstance(result, Exception)
+        ]
+        for idx, error in failures:
+            problem_logger.error(
+                "Не вдалося завантажити тестовий випадок %s для проблеми %s: %s",
+                idx,
+                problem_id,
+                error,
+            )
+        if failures:
+            raise failures[0][1]
 
         problem_logger.info(
-            f"Створено {len(testcases)} тестових випадків для проблеми з ID: {problem_id}"
+            "Створено %s тестових випадків для проблеми з ID: %s",
+            len(testcases),
+            problem_id,
         )
         return TestCaseResponse(
             problem_id=problem_id,
@@ -87,24 +135,169 @@ async def create_testcases_in_db(
         raise
     except Exception as e:
         problem_logger.error(
-            f"Не вдалося створити тестові випадки для проблеми {problem_id}: {str(e)}"
+            "Не вдалося створити тестові випадки для проблеми %s: %s", problem_id, e
         )
         raise DatabaseException(detail=f"Не вдалося створити тестові випадки: {str(e)}")
 
 
+async def create_testcase_upload_session(
+    db: AsyncSession, problem_id: uuid.UUID, testcase_count: int
+) -> TestCaseUploadSessionResponse:
+    """
+    Видає presigned URL, за якими клієнт завантажує тестові випадки напряму
+    в Spaces, минаючи API. Сесія живе в Redis до підтвердження або до
+    закінчення терміну дії URL.
+    """
+    problem = await db.get(Problem, problem_id)
+    if not problem:
+        raise ResourceNotFoundException(detail=f"Проблему {problem_id} не знайдено")
+
+    session_id = uuid.uuid4()
+    expires_in = Config.TESTCASE_UPLOAD_URL_TTL_SECONDS
+    await redis_client.set(
+        TESTCASE_UPLOAD_SESSION_KEY.format(session_id),
+        json.dumps({"problem_id": str(problem_id), "testcase_count": testcase_count}),
+        ex=expires_in,
+    )
+
+    def presign_all() -> List[TestCaseUploadUrls]:
+        return [
+            TestCaseUploadUrls(
+                number=number,
+                **presign_testcase_upload(str(session_id), number, expires_in),
+            )
+            for number in range(1, testcase_count + 1)
+        ]
+
+    # До 2000 підписів — надто довго для циклу подій, тож підписуємо в потоці
+    uploads = await asyncio.to_thread(presign_all)
+    problem_logger.info(
+        "Створено сесію завантаження %s для %s тестових випадків проблеми %s",
+        session_id,
+        testcase_count,
+        problem_id,
+    )
+    return TestCaseUploadSessionResponse(
+        session_id=session_id,
+        problem_id=problem_id,
+        expires_in=expires_in,
+        headers=TESTCASE_UPLOAD_HEADERS,
+        uploads=uploads,
+    )
+
+
+async def commit_testcase_upload_session(
+    session_id: uuid.UUID,
+) -> TestCaseResponse:
+    """
+    Підтверджує сесію завантаження, якщо всі файли тестових випадків уже є в
+    її проміжному префіксі. Якщо чогось бракує, сесія лишається відкритою, і
+    клієнт може дозавантажити файли та повторити підтвердження. Інакше файли
+    копіюються до тестів проблеми, а файли понад testcase_count, що лишились
+    від попередніх завантажень, видаляються.
+    """
+    key = TESTCASE_UPLOAD_SESSION_KEY.format(session_id)
+    session = await redis_client.get(key)
+    if not session:
+        raise ResourceNotFoundException(
+            detail=f"Сесію завантаження {session_id} не знайдено або вона завершилась"
+        )
+    session = json.loads(session)
+    problem_id = session["problem_id"]
+    testcase_count = session["testcase_count"]
+
+    lock = redis_client.lock(
+        TESTCASE_COMMIT_LOCK_KEY.format(problem_id),
+        timeout=TESTCASE_COMMIT_LOCK_TIMEOUT_SECONDS,
+        blocking_timeout=TESTCASE_COMMIT_LOCK_WAIT_SECONDS,
+    )
+    if not await lock.acquire():
+        raise BadRequestException(
+            detail=f"Тестові випадки проблеми {problem_id} вже оновлюються"
+        )
+    try:
+        # Ту саму сесію могли підтвердити, поки ми чекали на блокування
+        if not await redis_client.exists(key):
+            raise ResourceNotFoundException(
+                detail=f"Сесію завантаження {session_id} не знайдено або вона завершилась"
+            )
+        missing = await find_missing_testcases(
+            TESTCASE_STAGING_PREFIX.format(session_id), testcase_count
+        )
+        if missing:
+            problem_logger.warning(
+                "Сесія завантаження %s: бракує тестових випадків %s",
+                session_id,
+                missing,
+            )
+            raise ValidationException(
+                detail={"message": "Test case files are missing", "missing": missing}
+            )
+
+        await publish_staged_testcases(str(session_id), problem_id, testcase_count)
+        await delete_stale_testcases(problem_id, testcase_count)
+        await redis_client.delete(key)
+    finally:
+        try:
+            await lock.release()
+        except LockError as e:
+            # Блокування спливло за тайм-аутом раніше, ніж ми закінчили
+            problem_logger.warning(
+                "Не вдалося зняти блокування проблеми %s: %s", problem_id, e
+            )
+    problem_logger.info(
+        "Підтверджено %s тестових випадків для проблеми з ID: %s",
+        testcase_count,
+        problem_id,
+    )
+    return TestCaseResponse(
+        problem_id=problem_id,
+        testcase_count=testcase_count,
+        success=True,
+        message="Test cases uploaded successfully",
+    )
+
+
 async def get_problem_by_id(db: AsyncSession, problem_id: uuid.UUID) -> ProblemResponse:
-    """Отримує проблему за її ID."""
+    """Отримує проблему за її ID, спершу з кешу в Redis."""
+    # Кеш лише прискорює читання: якщо Redis недоступний, читаємо з бази
+    try:
+        cached = await redis_client.get_cached_problem(problem_id)
+    except Exception as e:
+        problem_logger.warning("Кеш проблем недоступний для %s: %s", problem_id, e)
+        cached = None
+    else:
+        if cached:
+            return ProblemResponse.model_validate_json(cached)
     try:
         problem = await db.get(Problem, problem_id)
         if not problem:
             raise ResourceNotFoundException(detail=f"Проблему {problem_id} не знайдено")
-        problem_logger.info(f"Отримано проблему з ID: {problem_id}")
-        return ProblemResponse.from_orm(problem)
+        problem_logger.info("Отримано проблему з ID: %s", problem_id)
+        response = ProblemResponse.from_orm(problem)
     except ResourceNotFoundException:
         raise
     except Exception as e:
-        problem_logger.error(f"Не вдалося отримати проблему {problem_id}: {str(e)}")
+        problem_logger.error("Не вдалося отримати проблему %s: %s", problem_id, e)
         raise DatabaseException(detail=f"Не вдалося отримати проблему: {str(e)}")
+    try:
+        await redis_client.cache_problem(problem_id, response.model_dump_json())
+    except Exception as e:
+        problem_logger.warning("Не вдалося закешувати проблему %s: %s", problem_id, e)
+    return response
+
+
+async def _invalidate_cached_problem(problem_id: uuid.UUID) -> None:
+    """
+    Прибирає проблему з кешу після зміни. Зміна вже закомічена, тож помилка
+    Redis лише логується: застарілий запис зникне разом із TTL.
+    """
+    try:
+        await redis_client.invalidate_cached_problem(problem_id)
+    except Exception as e:
+        problem_logger.error(
+            "Не вдалося очистити кеш проблеми %s: %s", problem_id, e
+        )
 
 
 async def update_problem_in_db(
@@ -112,16 +305,20 @@ async def update_problem_in_db(
 ) -> ProblemResponse:
     """Оновлює проблему в базі даних і DigitalOcean Spaces."""
     try:
-        problem = await db.get(Problem, problem_id)
+        # Оновлюємо проблему і отримуємо її новий стан одним запитом
+        if update_data:
+            problem = await db.scalar(
+                update(Problem)
+                .where(Problem.id == problem_id)
+                .values(**update_data)
+                .returning(Problem)
+            )
+        else:
+            problem = await db.get(Problem, problem_id)
         if not problem:
             raise ResourceNotFoundException(detail=f"Проблему {problem_id} не знайдено")
-
-        # Оновлюємо проблему в базі даних
-        await db.execute(
-            update(Problem).where(Problem.id == problem_id).values(**update_data)
-        )
         await db.commit()
-        await db.refresh(problem)
+        await _invalidate_cached_problem(problem_id)
 
         problem_data_json = json.dumps(
             {
@@ -138,12 +335,12 @@ async def update_problem_in_db(
         s3_key = f"problems/{problem_id}/problem.json"
         await upload_problem_to_s3(s3_key, problem_data_json)
 
-        problem_logger.info(f"Оновлено проблему з ID: {problem_id}")
+        problem_logger.info("Оновлено проблему з ID: %s", problem_id)
         return ProblemResponse.from_orm(problem)
     except ResourceNotFoundException:
         raise
     except Exception as e:
-        problem_logger.error(f"Не вдалося оновити проблему {problem_id}: {str(e)}")
+        problem_logger.error("Не вдалося оновити проблему %s: %s", problem_id, e)
         await db.rollback()
         raise DatabaseException(detail=f"Не вдалося оновити проблему: {str(e)}")
 
@@ -151,21 +348,22 @@ async def update_problem_in_db(
 async def delete_problem_from_db(db: AsyncSession, problem_id: uuid.UUID) -> dict:
     """Видаляє проблему з бази даних, зауважуючи, що очищення DigitalOcean Spaces потрібне окремо."""
     try:
-        problem = await db.get(Problem, problem_id)
-        if not problem:
+        # Видаляємо проблему з бази даних, перевіряючи її наявність тим самим запитом
+        deleted_id = await db.scalar(
+            delete(Problem).where(Problem.id == problem_id).returning(Problem.id)
+        )
+        if not deleted_id:
             raise ResourceNotFoundException(detail=f"Проблему {problem_id} не знайдено")
-
-        # Видаляємо проблему з бази даних
-        await db.execute(delete(Problem).where(Problem.id == problem_id))
         await db.commit()
+        await _invalidate_cached_problem(problem_id)
 
         # Примітка: очищення тестових випадків у DigitalOcean Spaces потрібно обробляти окремо
-        problem_logger.info(f"Видалено проблему з ID: {problem_id}")
+        problem_logger.info("Видалено проблему з ID: %s", problem_id)
         return {"message": f"Проблему {problem_id} успішно видалено"}
     except ResourceNotFoundException:
         raise
     except Exception as e:
-        problem_logger.error(f"Не вдалося видалити проблему {problem_id}: {str(e)}")
+        problem_logger.error("Не вдалося видалити проблему %s: %s", problem_id, e)
         await db.rollback()
         raise DatabaseException(detail=f"Не вдалося видалити проблему: {str(e)}")
 
@@ -183,9 +381,12 @@ async def list_problems_from_db(
         )
         problems = result.scalars().all()
         problem_logger.info(
-            f"Отримано список з {len(problems)} проблем, skip: {skip}, limit: {limit}"
+            "Отримано список з %s проблем, skip: %s, limit: %s",
+            len(problems),
+            skip,
+            limit,
         )
         return [ProblemResponse.from_orm(problem) for problem in problems]
     except Exception as e:
-        problem_logger.error(f"Не вдалося отримати список проблем: {str(e)}")
+        problem_logger.error("Не вдалося отримати список проблем: %s", e)
         raise DatabaseException(detail=f"Не вдалося отримати список проблем: {str(e)}")
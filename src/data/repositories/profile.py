@@ -2,7 +2,8 @@ from typing import List, Dict, Tuple
 from datetime import datetime
 from collections import Counter
 from pydantic import UUID4
-from sqlalchemy import select, extract, or_, func
+from sqlalchemy import bindparam, case, literal, select, extract, or_, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config import logger
@@ -12,6 +13,17 @@ from src.errors import DatabaseException, BadRequestException
 
 profile_logger = logger.getChild("profile")
 
+# Topics of the problem behind every match the user won, one row per match;
+# built once and executed with the user's ID bound
+_WON_MATCH_TOPICS = (
+    select(Problem.topics)
+    .join(Match, Match.problem_id == Problem.id)
+    .where(
+        Match.winner_id == bindparam("user_id"),
+        Match.status == MatchStatus.COMPLETED,
+    )
+)
+
 
 async def get_user_match_history(
         db: AsyncSession, user_id: UUID4, limit: int = 10, offset: int = 0
@@ -32,15 +44,15 @@ async def get_user_match_history(
     """
     try:
         # Get the total count of matches for the user
-        total_count_result = await db.execute(
-            select(Match)
+        total_count = await db.scalar(
+            select(func.count())
+            .select_from(Match)
             .where(
                 ((Match.player1_id == user_id) | (Match.player2_id == user_id)),
                 Match.status == MatchStatus.COMPLETED,
                 Match.winner_id.isnot(None),
             )
         )
-        total_count = len(total_count_result.scalars().all())
 
         # Get completed matches for the user with pagination
         result = await db.execute(
@@ -56,6 +68,20 @@ async def get_user_match_history(
         )
         matches = result.scalars().all()
 
+        # Load every opponent on the page with one query
+        enemy_ids = {
+            match.player2_id if match.player1_id == user_id else match.player1_id
+            for match in matches
+        }
+        enemies = {}
+        if enemy_ids:
+            enemy_result = await db.execute(
+                select(User.id, User.username, User.rating).where(
+                    User.id.in_(enemy_ids)
+                )
+            )
+            enemies = {enemy.id: enemy for enemy in enemy_result.all()}
+
         # Convert matches to match history entries
         match_history = []
         for match in matches:
@@ -69,11 +95,10 @@ async def get_user_match_history(
             )
 
             # Get the enemy user
-            enemy_result = await db.execute(select(User).where(User.id == enemy_id))
-            enemy = enemy_result.scalar_one_or_none()
+            enemy = enemies.get(enemy_id)
 
             if not enemy:
-                profile_logger.warning(f"Enemy user not found: ID {enemy_id}")
+                profile_logger.warning("Enemy user not found: ID %s", enemy_id)
                 continue
 
             # Create match history entry
@@ -98,7 +123,53 @@ async def get_user_match_history(
         return match_history, total_count
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving match history for user {user_id}: {str(e)}"
+            "Error retrieving match history for user %s: %s", user_id, e
+        )
+        raise DatabaseException(
+            detail="Failed to retrieve match history due to database error"
+        )
+
+
+async def get_user_match_history_version(
+        db: AsyncSession, user_id: UUID4
+) -> Tuple[int, datetime | None, int, str | None]:
+    """
+    Get a cheap fingerprint of a user's match history.
+
+    Returns:
+        Tuple of (number of finished matches, latest end time, number of
+        those matches whose rating changes are already recorded, digest of
+        the opponents' current usernames and ratings, which the history
+        shows live)
+    """
+    opponent_id = case(
+        (Match.player1_id == user_id, Match.player2_id), else_=Match.player1_id
+    )
+    try:
+        result = await db.execute(
+            select(
+                func.count(),
+                func.max(Match.end_time),
+                func.count(Match.player1_new_rating),
+                func.md5(
+                    func.string_agg(
+                        func.concat(User.username, ":", User.rating),
+                        aggregate_order_by(literal(","), Match.id),
+                    )
+                ),
+            )
+            .select_from(Match)
+            .outerjoin(User, User.id == opponent_id)
+            .where(
+                ((Match.player1_id == user_id) | (Match.player2_id == user_id)),
+                Match.status == MatchStatus.COMPLETED,
+                Match.winner_id.isnot(None),
+            )
+        )
+        return tuple(result.one())
+    except Exception as e:
+        profile_logger.error(
+            "Error retrieving match history version for user %s: %s", user_id, e
         )
         raise DatabaseException(
             detail="Failed to retrieve match history due to database error"
@@ -154,7 +225,10 @@ async def get_user_contribution_calendar(
         raise e
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving contribution calendar for user {user_id} for year {year}: {str(e)}"
+            "Error retrieving contribution calendar for user %s for year %s: %s",
+            user_id,
+            year,
+            e,
         )
         raise DatabaseException(
             detail="Failed to retrieve contribution calendar due to database error"
@@ -188,11 +262,10 @@ async def get_user_rating_history(
         matches = result.scalars().all()
 
         # Get the user's initial rating
-        user_result = await db.execute(select(User).where(User.id == user_id))
-        user = user_result.scalar_one_or_none()
+        user = await db.get(User, user_id)
 
         if not user:
-            profile_logger.warning(f"User not found: ID {user_id}")
+            profile_logger.warning("User not found: ID %s", user_id)
             raise BadRequestException(detail="User not found")
 
         # Create rating history entries
@@ -224,7 +297,7 @@ async def get_user_rating_history(
         raise e
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving rating history for user {user_id}: {str(e)}"
+            "Error retrieving rating history for user %s: %s", user_id, e
         )
         raise DatabaseException(
             detail="Failed to retrieve rating history due to database error"
@@ -246,39 +319,23 @@ async def get_user_topic_stats(
         Topic statistics data
     """
     try:
-        profile_logger.info(f"Getting topic statistics for user {user_id}")
+        profile_logger.info("Getting topic statistics for user %s", user_id)
 
-        # Get completed matches where the user is the winner
-        result = await db.execute(
-            select(Match)
-            .where(
-                Match.winner_id == user_id,
-                Match.status == MatchStatus.COMPLETED,
-                Match.problem_id.isnot(None)
-            )
-        )
-        matches = result.scalars().all()
+        # Get the topics of the problems from completed matches the user won
+        result = await db.execute(_WON_MATCH_TOPICS, {"user_id": user_id})
+        won_topics = result.scalars().all()
 
-        if not matches:
-            profile_logger.info(f"No won matches found for user {user_id}")
+        if not won_topics:
+            profile_logger.info("No won matches found for user %s", user_id)
             return TopicStats(topics=[])
 
-        # Get the problems associated with those matches
-        problem_ids = [match.problem_id for match in matches if match.problem_id]
-
         # Create a dictionary to store topic counts
         topic_counts = Counter()
 
-        # Process each problem to extract topics
-        for problem_id in problem_ids:
-            problem_result = await db.execute(
-                select(Problem).where(Problem.id == problem_id)
-            )
-            problem = problem_result.scalar_one_or_none()
-
-            if problem and problem.topics:
+        for topics in won_topics:
+            if topics:
                 # Increment the count for each topic in this problem
-                for topic in problem.topics:
+                for topic in topics:
                     topic_counts[topic] += 1
 
         # Get the top N topics
@@ -291,13 +348,13 @@ async def get_user_topic_stats(
         ]
 
         profile_logger.info(
-            f"Retrieved {len(topic_stats)} topic statistics for user {user_id}"
+            "Retrieved %s topic statistics for user %s", len(topic_stats), user_id
         )
 
         return TopicStats(topics=topic_stats)
     except Exception as e:
         profile_logger.error(
-            f"Error retrieving topic statistics for user {user_id}: {str(e)}"
+            "Error retrieving topic statistics for user %s: %s", user_id, e
         )
         raise DatabaseException(
             detail="Failed to retrieve topic statistics due to database error"
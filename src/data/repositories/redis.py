@@ -1,11 +1,37 @@
 import os
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from fastapi import HTTPException
-from redis.asyncio import Redis  # Use async Redis client
+from redis.asyncio import BlockingConnectionPool, Redis  # Use async Redis client
+from redis.asyncio.client import PubSub
+from redis.asyncio.lock import Lock
+from redis.exceptions import NoScriptError
 from src.config import Config
 
 
+class MockPipeline:
+    """A mock Redis pipeline that replays queued commands on execute()."""
+
+    def __init__(self, redis: "MockRedis"):
+        self._redis = redis
+        self._commands: List[tuple] = []
+
+    async def __aenter__(self) -> "MockPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._commands.clear()
+
+    def setex(self, name: str, time: int, value: str) -> "MockPipeline":
+        self._commands.append((self._redis.setex, (name, time, value)))
+        return self
+
+    async def execute(self) -> List[Any]:
+        results = [await command(*args) for command, args in self._commands]
+        self._commands.clear()
+        return results
+
+
 class MockRedis:
     """A mock Redis implementation for testing purposes with async support."""
 
@@ -38,6 +64,9 @@ class MockRedis:
     async def ping(self) -> bool:
         return True
 
+    def pipeline(self, transaction: bool = True) -> MockPipeline:
+        return MockPipeline(self)
+
     async def close(self) -> None:
         pass
 
@@ -45,6 +74,9 @@ class MockRedis:
         if name not in self.sorted_sets:
             self.sorted_sets[name] = []
         for value, score in mapping.items():
+            self.sorted_sets[name] = [
+                item for item in self.sorted_sets[name] if item[0] != value
+            ]
             self.sorted_sets[name].append((value, score))
         self.sorted_sets[name].sort(key=lambda x: x[1])
 
@@ -53,6 +85,11 @@ class MockRedis:
             return []
         return [item[0] for item in self.sorted_sets[name][start : end + 1]]
 
+    async def zrangebyscore(self, name: str, min: float, max: float) -> List[str]:
+        return [
+            item[0] for item in self.sorted_sets.get(name, []) if min <= item[1] <= max
+        ]
+
     async def zrem(self, name: str, value: str) -> int:
         if name not in self.sorted_sets:
             return 0
@@ -62,16 +99,17 @@ class MockRedis:
         ]
         return original_len - len(self.sorted_sets[name])
 
-    async def delete(self, name: str) -> int:
-        if name in self.data:
-            del self.data[name]
-            if name in self.expiry:
-                del self.expiry[name]
-            return 1
-        if name in self.sorted_sets:
-            del self.sorted_sets[name]
-            return 1
-        return 0
+    async def delete(self, *names: str) -> int:
+        deleted = 0
+        for name in names:
+            if name in self.data:
+                del self.data[name]
+                self.expiry.pop(name, None)
+                deleted += 1
+            elif name in self.sorted_sets:
+                del self.sorted_sets[name]
+                deleted += 1
+        return deleted
 
 
 class RedisClient:
@@ -86,6 +124,7 @@ class RedisClient:
 
     def __init__(self):
         self.redis = None
+        self._pool = None
         self.JTI_EXPIRY = Config.JWT_ACCESS_TOKEN_EXPIRY
         self._connected = False
 
@@ -97,13 +136,19 @@ class RedisClient:
                     self._connected = True
                     return
 
-                self.redis = Redis(
+                # One bounded pool shared by every caller (routes, middleware);
+                # when it is exhausted, callers wait for a free connection
+                # instead of failing with "Too many connections"
+                self._pool = BlockingConnectionPool(
                     host=Config.REDIS_HOST,
                     port=Config.REDIS_PORT,
                     db=0,
                     password=Config.REDIS_PASSWORD,
                     decode_responses=True,
+                    max_connections=Config.REDIS_MAX_CONNECTIONS,
+                    timeout=Config.REDIS_POOL_TIMEOUT_SECONDS,
                 )
+                self.redis = Redis(connection_pool=self._pool)
                 await self.redis.ping()  # Async ping
                 self._connected = True
             except Exception as e:
@@ -118,6 +163,8 @@ class RedisClient:
     async def close(self):
         if self.redis:
             await self.redis.close()
+        if self._pool:
+            await self._pool.disconnect()
 
     async def get(self, name: str) -> Any:
         if not self._connected:
@@ -159,6 +206,29 @@ class RedisClient:
                 status_code=500, detail=f"Redis operation failed: {str(e)}"
             )
 
+    async def script_load(self, script: str) -> str:
+        if not self._connected:
+            await self.connect()
+        try:
+            return await self.redis.script_load(script)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
+    async def evalsha(self, sha: str, numkeys: int, *keys_and_args: Any) -> Any:
+        if not self._connected:
+            await self.connect()
+        try:
+            return await self.redis.evalsha(sha, numkeys, *keys_and_args)
+        except NoScriptError:
+            # Let callers reload the script (e.g. after a Redis restart)
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
     async def add_jti_to_blocklist(self, jti: str) -> None:
         if not self._connected:
             await self.connect()
@@ -171,6 +241,49 @@ class RedisClient:
                 status_code=500, detail=f"Redis operation failed: {str(e)}"
             )
 
+    async def add_jtis_to_blocklist(self, jtis: List[str]) -> None:
+        """Blocklist several token JTIs in a single round trip."""
+        if not self._connected:
+            await self.connect()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for jti in jtis:
+                    pipe.setex(name=f"jti:{jti}", time=self.JTI_EXPIRY, value="revoked")
+                await pipe.execute()
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
+    async def get_cached_user(self, user_id: Any) -> Optional[str]:
+        """Return the cached public user payload, if any."""
+        return await self.get(f"user:{user_id}")
+
+    async def cache_user(self, user_id: Any, payload: str) -> None:
+        await self.set(f"user:{user_id}", payload, ex=Config.USER_CACHE_TTL_SECONDS)
+
+    async def invalidate_cached_users(self, *user_ids: Any) -> None:
+        if not self._connected:
+            await self.connect()
+        try:
+            await self.redis.delete(*(f"user:{user_id}" for user_id in user_ids))
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
+    async def get_cached_problem(self, problem_id: Any) -> Optional[str]:
+        """Return the cached problem payload, if any."""
+        return await self.get(f"problem:{problem_id}")
+
+    async def cache_problem(self, problem_id: Any, payload: str) -> None:
+        await self.set(
+            f"problem:{problem_id}", payload, ex=Config.PROBLEM_CACHE_TTL_SECONDS
+        )
+
+    async def invalidate_cached_problem(self, problem_id: Any) -> None:
+        await self.delete(f"problem:{problem_id}")
+
     async def token_in_blocklist(self, jti: str) -> bool:
         if not self._connected:
             await self.connect()
@@ -181,6 +294,26 @@ class RedisClient:
                 status_code=500, detail=f"Redis operation failed: {str(e)}"
             )
 
+    async def publish(self, channel: str, message: str) -> int:
+        if not self._connected:
+            await self.connect()
+        try:
+            return await self.redis.publish(channel, message)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
+    def pubsub(self) -> PubSub:
+        """A pub/sub connection from the shared pool; connect() must have run."""
+        return self.redis.pubsub(ignore_subscribe_messages=True)
+
+    def lock(self, name: str, timeout: float, blocking_timeout: float) -> Lock:
+        """A lock shared by every worker; connect() must have run."""
+        return self.redis.lock(
+            name, timeout=timeout, blocking_timeout=blocking_timeout
+        )
+
     async def zadd(self, name: str, mapping: Dict[str, float]) -> None:
         if not self._connected:
             await self.connect()
@@ -201,6 +334,16 @@ class RedisClient:
                 status_code=500, detail=f"Redis operation failed: {str(e)}"
             )
 
+    async def zrangebyscore(self, name: str, min: float, max: float) -> List[str]:
+        if not self._connected:
+            await self.connect()
+        try:
+            return await self.redis.zrangebyscore(name, min, max)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Redis operation failed: {str(e)}"
+            )
+
     async def zrem(self, name: str, value: Union[str, bytes]) -> int:
         if not self._connected:
             await self.connect()
@@ -1,5 +1,7 @@
+import asyncio
 import json
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, List
 
 import boto3
 from botocore.client import Config
@@ -10,9 +12,27 @@ from src.config import logger
 
 s3_logger = logger.getChild("s3")
 
+# Headers a client must send when using a presigned testcase PUT URL; they are
+# part of the signature, so uploads end up stored like upload_testcase_to_s3's
+TESTCASE_UPLOAD_HEADERS = {"Content-Type": "text/plain", "x-amz-acl": "public-read"}
 
+# Presigned uploads land here, one prefix per session, and only reach the
+# graded tests/{problem_id}/ prefix once the session is committed
+TESTCASE_STAGING_PREFIX = "uploads/{}/"
+
+
+@lru_cache(maxsize=None)
 def get_s3_client():
-    """Create and return a synchronous S3 client for DigitalOcean Spaces."""
+    """
+    Return the synchronous S3 client for DigitalOcean Spaces.
+
+    Built once per process and shared: boto3 clients are thread-safe, and
+    reusing one keeps its HTTP connection pool instead of opening new
+    connections and re-reading credentials for every upload. The pool is
+    sized for S3_MAX_CONCURRENCY testcases in flight, each of them moving an
+    input and an output file at once; botocore's default of 10 would make
+    the surplus threads open and discard connections.
+    """
     session = boto3.session.Session()
     return session.client(
         "s3",
@@ -20,7 +40,10 @@ def get_s3_client():
         region_name=AppConfig.AWS_REGION,
         aws_access_key_id=AppConfig.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=AppConfig.AWS_SECRET_ACCESS_KEY,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=2 * AppConfig.S3_MAX_CONCURRENCY,
+        ),
     )
 
 
@@ -28,25 +51,27 @@ async def upload_problem_to_s3(problem_id: str, problem_data: Dict[str, Any]) ->
     s3_client = get_s3_client()
     try:
         s3_logger.debug(
-            f"Problem data type: {type(problem_data)}, data: {problem_data}"
+            "Problem data type: %s, data: %s", type(problem_data), problem_data
         )
         problem_json = json.dumps(problem_data)
         bucket_name = AppConfig.AWS_BUCKET_NAME
         file_path = f"problems/{problem_id}.json"
-        s3_client.put_object(
+        # boto3 blocks, so the PUT runs in a worker thread
+        await asyncio.to_thread(
+            s3_client.put_object,
             Bucket=bucket_name,
             Key=file_path,
             Body=problem_json,
             ACL="public-read",
             ContentType="application/json",
         )
-        s3_logger.info(f"Uploaded problem {problem_id} to {file_path}")
+        s3_logger.info("Uploaded problem %s to %s", problem_id, file_path)
         return file_path
     except ClientError as e:
-        s3_logger.error(f"Error uploading problem {problem_id} to S3: {str(e)}")
+        s3_logger.error("Error uploading problem %s to S3: %s", problem_id, e)
         raise
     except TypeError as e:
-        s3_logger.error(f"Serialization error for problem {problem_id}: {str(e)}")
+        s3_logger.error("Serialization error for problem %s: %s", problem_id, e)
         raise
 
 
@@ -58,25 +83,221 @@ async def upload_testcase_to_s3(
     bucket_name = AppConfig.AWS_BUCKET_NAME
     try:
         input_path = f"tests/{problem_id}/{testcase_number}.in"
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=input_path,
-            Body=input_data,
-            ACL="public-read",
-            ContentType="text/plain",
-        )
         output_path = f"tests/{problem_id}/{testcase_number}.out"
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=output_path,
-            Body=output_data,
-            ACL="public-read",
-            ContentType="text/plain",
+        # boto3 blocks, so both PUTs run in worker threads, side by side
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    s3_client.put_object,
+                    Bucket=bucket_name,
+                    Key=path,
+                    Body=data,
+                    ACL="public-read",
+                    ContentType="text/plain",
+                )
+                for path, data in ((input_path, input_data), (output_path, output_data))
+            )
+        )
+        s3_logger.info(
+            "Uploaded testcase %s for problem %s", testcase_number, problem_id
         )
-        s3_logger.info(f"Uploaded testcase {testcase_number} for problem {problem_id}")
         return {"input_path": input_path, "output_path": output_path}
     except ClientError as e:
         s3_logger.error(
-            f"Error uploading testcase {testcase_number} for problem {problem_id}: {str(e)}"
+            "Error uploading testcase %s for problem %s: %s",
+            testcase_number,
+            problem_id,
+            e,
         )
         raise
+
+
+def presign_testcase_upload(
+    session_id: str, testcase_number: int, expires_in: int
+) -> Dict[str, str]:
+    """
+    Create presigned PUT URLs for a testcase's input and output files in the
+    session's staging prefix. Signing is computed locally, so no request is
+    made to Spaces.
+    """
+    s3_client = get_s3_client()
+    prefix = TESTCASE_STAGING_PREFIX.format(session_id)
+    urls = {}
+    for name, extension in (("input_url", "in"), ("output_url", "out")):
+        urls[name] = s3_client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": AppConfig.AWS_BUCKET_NAME,
+                "Key": f"{prefix}{testcase_number}.{extension}",
+                "ACL": TESTCASE_UPLOAD_HEADERS["x-amz-acl"],
+                "ContentType": TESTCASE_UPLOAD_HEADERS["Content-Type"],
+            },
+            ExpiresIn=expires_in,
+        )
+    return urls
+
+
+async def find_missing_testcases(prefix: str, testcase_count: int) -> List[int]:
+    """
+    Return the numbers of testcases, out of 1..testcase_count, whose input or
+    output file is not under prefix in Spaces. All files are checked
+    concurrently.
+    """
+    s3_client = get_s3_client()
+    bucket_name = AppConfig.AWS_BUCKET_NAME
+    semaphore = asyncio.Semaphore(AppConfig.S3_MAX_CONCURRENCY)
+
+    async def exists(key: str) -> bool:
+        async with semaphore:
+            try:
+                await asyncio.to_thread(
+                    s3_client.head_object, Bucket=bucket_name, Key=key
+                )
+                return True
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                    return False
+                s3_logger.error("Error checking %s in S3: %s", key, e)
+                raise
+
+    numbers = range(1, testcase_count + 1)
+    found = await asyncio.gather(
+        *(
+            exists(f"{prefix}{number}.{extension}")
+            for number in numbers
+            for extension in ("in", "out")
+        )
+    )
+    return [
+        number
+        for number, has_input, has_output in zip(numbers, found[::2], found[1::2])
+        if not (has_input and has_output)
+    ]
+
+
+async def delete_stale_testcases(problem_id: str, testcase_count: int) -> int:
+    """
+    Delete every file under the problem's testcase prefix other than
+    1..testcase_count's input and output, e.g. leftovers of an earlier, larger
+    upload that fetch_test_cases would otherwise still run. Returns how many
+    files were deleted.
+    """
+    s3_client = get_s3_client()
+    bucket_name = AppConfig.AWS_BUCKET_NAME
+    prefix = f"tests/{problem_id}/"
+    expected = {
+        f"{prefix}{number}.{extension}"
+        for number in range(1, testcase_count + 1)
+        for extension in ("in", "out")
+    }
+
+    def delete() -> int:
+        paginator = s3_client.get_paginator("list_objects_v2")
+        stale = [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+            for obj in page.get("Contents", [])
+            if obj["Key"] not in expected
+        ]
+        # DeleteObjects takes at most 1000 keys per request
+        for start in range(0, len(stale), 1000):
+            response = s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in stale[start : start + 1000]],
+                    "Quiet": True,
+                },
+            )
+            errors = response.get("Errors", [])
+            if errors:
+                s3_logger.error(
+                    "Failed to delete stale testcase files for problem %s: %s",
+                    problem_id,
+                    errors,
+                )
+                raise RuntimeError(
+                    f"Failed to delete {len(errors)} stale testcase files"
+                )
+        return len(stale)
+
+    try:
+        # Listing and deleting block, so they run in a worker thread
+        deleted = await asyncio.to_thread(delete)
+    except ClientError as e:
+        s3_logger.error(
+            "Error deleting stale testcases for problem %s: %s", problem_id, e
+        )
+        raise
+    if deleted:
+        s3_logger.info(
+            "Deleted %s stale testcase files for problem %s", deleted, problem_id
+        )
+    return deleted
+
+
+async def publish_staged_testcases(
+    session_id: str, problem_id: str, testcase_count: int
+) -> None:
+    """
+    Copy a committed session's testcases from its staging prefix into the
+    problem's graded prefix, server-side, then remove the staged copies.
+    """
+    s3_client = get_s3_client()
+    bucket_name = AppConfig.AWS_BUCKET_NAME
+    staging_prefix = TESTCASE_STAGING_PREFIX.format(session_id)
+    semaphore = asyncio.Semaphore(AppConfig.S3_MAX_CONCURRENCY)
+    names = [
+        f"{number}.{extension}"
+        for number in range(1, testcase_count + 1)
+        for extension in ("in", "out")
+    ]
+
+    async def copy(name: str) -> None:
+        async with semaphore:
+            await asyncio.to_thread(
+                s3_client.copy_object,
+                Bucket=bucket_name,
+                Key=f"tests/{problem_id}/{name}",
+                CopySource={"Bucket": bucket_name, "Key": f"{staging_prefix}{name}"},
+                ACL="public-read",
+                ContentType="text/plain",
+                MetadataDirective="REPLACE",
+            )
+
+    try:
+        await asyncio.gather(*(copy(name) for name in names))
+    except ClientError as e:
+        s3_logger.error(
+            "Error publishing testcases of session %s for problem %s: %s",
+            session_id,
+            problem_id,
+            e,
+        )
+        raise
+    s3_logger.info(
+        "Published %s testcases of session %s for problem %s",
+        testcase_count,
+        session_id,
+        problem_id,
+    )
+
+    def delete_staged() -> None:
+        for start in range(0, len(names), 1000):
+            s3_client.delete_objects(
+                Bucket=bucket_name,
+                Delete={
+                    "Objects": [
+                        {"Key": f"{staging_prefix}{name}"}
+                        for name in names[start : start + 1000]
+                    ],
+                    "Quiet": True,
+                },
+            )
+
+    # The testcases are live by now; leftovers only cost storage
+    try:
+        await asyncio.to_thread(delete_staged)
+    except ClientError as e:
+        s3_logger.warning(
+            "Error removing staged files of session %s: %s", session_id, e
+        )
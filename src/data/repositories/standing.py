@@ -26,8 +26,7 @@ async def get_standing(
     try:
         # Get total count
         count_query = select(func.count()).select_from(User)
-        result = await db.execute(count_query)
-        total = result.scalar_one()
+        total = await db.scalar(count_query)
 
         # Get users sorted by rating (descending)
         query = select(User).order_by(User.rating.desc()).offset(offset).limit(limit)
@@ -35,11 +34,11 @@ async def get_standing(
         users = result.scalars().all()
 
         standing_logger.info(
-            f"Retrieved {len(users)} users for standing (total: {total})"
+            "Retrieved %s users for standing (total: %s)", len(users), total
         )
         return users, total
     except Exception as e:
-        standing_logger.error(f"Error retrieving standing: {str(e)}")
+        standing_logger.error("Error retrieving standing: %s", e)
         raise DatabaseException(
             detail="Failed to retrieve standing due to database error"
         )
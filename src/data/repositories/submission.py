@@ -1,5 +1,9 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 import requests
+from botocore.client import Config as BotoConfig
 from botocore.exceptions import ClientError
 from pydantic import UUID4
 from sqlalchemy import select
@@ -18,30 +22,28 @@ async def get_match_by_id(db: AsyncSession, match_id: UUID4) -> Match:
     Get a match by ID from the database.
     """
     try:
-        result = await db.execute(select(Match).where(Match.id == match_id))
-        match = result.scalars().first()
+        match = await db.get(Match, match_id)
         if not match:
-            submission_logger.warning(f"Match not found: ID {match_id}")
+            submission_logger.warning("Match not found: ID %s", match_id)
             raise ResourceNotFoundException(detail="Match not found")
         return match
     except Exception as e:
-        submission_logger.error(f"Error retrieving match {match_id}: {str(e)}")
+        submission_logger.error("Error retrieving match %s: %s", match_id, e)
         raise
 
 
-async def get_problem_by_id(db: AsyncSession, problem_id: str) -> Problem:
+async def get_problem_by_id(db: AsyncSession, problem_id: UUID4) -> Problem:
     """
     Get a problem by ID from the database.
     """
     try:
-        result = await db.execute(select(Problem).where(Problem.id == problem_id))
-        problem = result.scalars().first()
+        problem = await db.get(Problem, problem_id)
         if not problem:
-            submission_logger.warning(f"Problem not found: ID {problem_id}")
+            submission_logger.warning("Problem not found: ID %s", problem_id)
             raise ResourceNotFoundException(detail="Problem not found")
         return problem
     except Exception as e:
-        submission_logger.error(f"Error retrieving problem {problem_id}: {str(e)}")
+        submission_logger.error("Error retrieving problem %s: %s", problem_id, e)
         raise
 
 
@@ -54,7 +56,7 @@ async def get_users_by_ids(db: AsyncSession, user_ids: list[str]) -> list[User]:
         users = result.scalars().all()
         return users
     except Exception as e:
-        submission_logger.error(f"Error retrieving users {user_ids}: {str(e)}")
+        submission_logger.error("Error retrieving users %s: %s", user_ids, e)
         raise
 
 
@@ -73,6 +75,8 @@ def fetch_test_cases(problem_id: str) -> list[dict]:
         endpoint_url=f"https://{Config.AWS_REGION}.digitaloceanspaces.com",
         aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
+        # One connection per download thread below
+        config=BotoConfig(max_pool_connections=Config.S3_MAX_CONCURRENCY),
     )
 
     prefix = f"tests/{problem_id}/"
@@ -92,26 +96,35 @@ def fetch_test_cases(problem_id: str) -> list[dict]:
         # 3. Get all valid test indices that have both .in and .out
         valid_indices = sorted(input_files & output_files)
 
-        for idx in valid_indices:
-            try:
-                input_obj = s3.get_object(Bucket=bucket_name, Key=f"{prefix}{idx}.in")
-                output_obj = s3.get_object(Bucket=bucket_name, Key=f"{prefix}{idx}.out")
-
-                input_data = input_obj["Body"].read().decode("utf-8")
-                output_data = output_obj["Body"].read().decode("utf-8")
+        def read(key: str) -> str:
+            return s3.get_object(Bucket=bucket_name, Key=key)["Body"].read().decode(
+                "utf-8"
+            )
 
-                test_cases.append({"input": input_data, "expected_output": output_data})
+        # 4. Download every file at once rather than one GET after another;
+        # the client is thread-safe and the results keep the index order
+        with ThreadPoolExecutor(max_workers=Config.S3_MAX_CONCURRENCY) as pool:
+            inputs = [pool.submit(read, f"{prefix}{idx}.in") for idx in valid_indices]
+            outputs = [pool.submit(read, f"{prefix}{idx}.out") for idx in valid_indices]
 
+        for idx, input_data, output_data in zip(valid_indices, inputs, outputs):
+            try:
+                test_cases.append(
+                    {
+                        "input": input_data.result(),
+                        "expected_output": output_data.result(),
+                    }
+                )
             except ClientError as e:
-                submission_logger.warning(f"Failed to fetch test case {idx}: {str(e)}")
+                submission_logger.warning("Failed to fetch test case %s: %s", idx, e)
 
         submission_logger.info(
-            f"Fetched {len(test_cases)} test cases for problem {problem_id}"
+            "Fetched %s test cases for problem %s", len(test_cases), problem_id
         )
         return test_cases
 
     except Exception as e:
-        submission_logger.error(f"Error fetching test cases: {str(e)}")
+        submission_logger.error("Error fetching test cases: %s", e)
         return []
 
 
@@ -149,12 +162,16 @@ async def check_solution(code: str, language: str, test_cases: list[dict]) -> bo
                 ],
             }
 
-            submission_logger.info(f"Running test case {i + 1}/{len(test_cases)}")
-            response = requests.post(url, json=payload, headers=headers)
+            submission_logger.info("Running test case %s/%s", i + 1, len(test_cases))
+            response = await asyncio.to_thread(
+                requests.post, url, json=payload, headers=headers
+            )
 
             if response.status_code != 200:
                 submission_logger.error(
-                    f"OneCompiler API error: {response.status_code} - {response.text}"
+                    "OneCompiler API error: %s - %s",
+                    response.status_code,
+                    response.text,
                 )
                 return False
 
@@ -163,7 +180,7 @@ async def check_solution(code: str, language: str, test_cases: list[dict]) -> bo
             # Check if there was an error during execution
             if result.get("error"):
                 submission_logger.debug(
-                    f"Solution failed on test case {i + 1}: Execution error"
+                    "Solution failed on test case %s: Execution error", i + 1
                 )
                 return False
 
@@ -173,10 +190,10 @@ async def check_solution(code: str, language: str, test_cases: list[dict]) -> bo
 
             if actual_output != expected_output:
                 submission_logger.info(
-                    f"Solution failed on test case {i + 1}: Output mismatch"
+                    "Solution failed on test case %s: Output mismatch", i + 1
                 )
                 submission_logger.debug(
-                    f"Expected: '{expected_output}', Actual: '{actual_output}'"
+                    "Expected: '%s', Actual: '%s'", expected_output, actual_output
                 )
                 return False
 
@@ -184,7 +201,7 @@ async def check_solution(code: str, language: str, test_cases: list[dict]) -> bo
         submission_logger.info("Solution passed all test cases")
         return True
     except Exception as e:
-        submission_logger.error(f"Error checking solution: {str(e)}")
+        submission_logger.error("Error checking solution: %s", e)
         return False
 
 
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 from pydantic import UUID4
 from sqlalchemy import select
@@ -14,14 +14,13 @@ user_logger = logger.getChild("user")
 async def get_user_by_id(db: AsyncSession, user_id: UUID4) -> User:
     """Get a user by ID from the database."""
     try:
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
+        user = await db.get(User, user_id)
         if not user:
-            user_logger.warning(f"User not found: ID {user_id}")
+            user_logger.warning("User not found: ID %s", user_id)
             raise ResourceNotFoundException(detail="User not found")
         return user
     except Exception as e:
-        user_logger.error(f"Error retrieving user {user_id}: {str(e)}")
+        user_logger.error("Error retrieving user %s: %s", user_id, e)
         raise DatabaseException(detail="Failed to retrieve user due to database error")
 
 
@@ -32,5 +31,17 @@ async def get_users_by_ids(db: AsyncSession, ids: List[UUID4]) -> List[User]:
         users = result.scalars().all()
         return users
     except Exception as e:
-        user_logger.error(f"Error retrieving users {ids}: {str(e)}")
+        user_logger.error("Error retrieving users %s: %s", ids, e)
+        raise DatabaseException(detail="Failed to retrieve users due to database error")
+
+
+async def get_usernames_by_ids(db: AsyncSession, ids: List[UUID4]) -> Dict[UUID4, str]:
+    """Get the usernames of the given users, without loading the full rows."""
+    try:
+        result = await db.execute(
+            select(User.id, User.username).where(User.id.in_(ids))
+        )
+        return {user_id: username for user_id, username in result.all()}
+    except Exception as e:
+        user_logger.error("Error retrieving usernames %s: %s", ids, e)
         raise DatabaseException(detail="Failed to retrieve users due to database error")
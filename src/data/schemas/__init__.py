@@ -10,6 +10,13 @@ from .match import (
     CapitulateRequest,
     PlayerQueueEntry,
     MatchQueueResult,
+    MatchFoundNotification,
+    OPEN_MATCH_STATUS_SQL,
+    MatchQueueStatusResponse,
+    MatchAcceptResponse,
+    MatchDeclineResponse,
+    ActiveMatchOpponent,
+    ActiveMatchResponse,
 )
 from .problem import (
     Problem,
@@ -21,7 +28,14 @@ from .problem import (
 )
 from .profile import MatchHistoryEntry, ContributionCalendarEntry, ContributionCalendar, RatingHistoryEntry, RatingHistory, MatchHistory, TopicStatEntry, TopicStats
 from .user import User
-from .testcase import TestCase, TestCaseCreate, TestCaseResponse
+from .testcase import (
+    TestCase,
+    TestCaseCreate,
+    TestCaseResponse,
+    TestCaseUploadSessionCreate,
+    TestCaseUploadSessionResponse,
+    TestCaseUploadUrls,
+)
 from .submission import SubmissionCreate
 from .auth import (
     UserBase,
@@ -59,6 +73,13 @@ __all__ = [
     "MatchResponse",
     "PlayerQueueEntry",
     "MatchQueueResult",
+    "MatchFoundNotification",
+    "OPEN_MATCH_STATUS_SQL",
+    "MatchQueueStatusResponse",
+    "MatchAcceptResponse",
+    "MatchDeclineResponse",
+    "ActiveMatchOpponent",
+    "ActiveMatchResponse",
     "ProblemCreate",
     "ProblemResponse",
     "ProblemUpdate",
@@ -66,6 +87,9 @@ __all__ = [
     "TestCaseCreate",
     "TestCaseResponse",
     "TestCase",
+    "TestCaseUploadSessionCreate",
+    "TestCaseUploadSessionResponse",
+    "TestCaseUploadUrls",
     "SubmissionCreate",
     "CapitulateRequest",
     "ProblemDetail",
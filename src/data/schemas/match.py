@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
 from typing import Optional
-from pydantic import UUID4
-from sqlalchemy import Column, DateTime
+from pydantic import UUID4, ConfigDict
+from pydantic import BaseModel as PydanticBaseModel
+from sqlalchemy import Column, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID as SA_UUID
 from sqlalchemy import Enum as SQLEnum
 from sqlmodel import Field, SQLModel
@@ -18,6 +19,12 @@ class MatchStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+# Statuses of a match that still blocks its players from queueing again. Kept as
+# literal SQL so queries repeat the partial index predicate word for word and
+# the planner can match it even for generic prepared-statement plans.
+OPEN_MATCH_STATUS_SQL = "status IN ('CREATED', 'PENDING', 'ACTIVE')"
+
+
 class MatchBase(BaseModel):
     player1_id: UUID4
     player2_id: UUID4
@@ -26,16 +33,29 @@ class MatchBase(BaseModel):
 
 
 class FindMatchRequest(SQLModel):
-    user_id: str
+    user_id: UUID4
 
 
 class AcceptMatchRequest(SQLModel):
-    user_id: str
-    match_id: str
+    user_id: UUID4
+    match_id: UUID4
 
 
 class Match(BaseModel, table=True):
     __tablename__ = "matches"
+    __table_args__ = (
+        # Open matches are a tiny slice of the table, so these stay small
+        Index(
+            "ix_match_open_player1",
+            "player1_id",
+            postgresql_where=text(OPEN_MATCH_STATUS_SQL),
+        ),
+        Index(
+            "ix_match_open_player2",
+            "player2_id",
+            postgresql_where=text(OPEN_MATCH_STATUS_SQL),
+        ),
+    )
 
     player1_id: UUID4 = Field(sa_column=Column(SA_UUID(as_uuid=True), nullable=False))
     player2_id: UUID4 = Field(sa_column=Column(SA_UUID(as_uuid=True), nullable=False))
@@ -95,3 +115,53 @@ class MatchQueueResult(BaseModel):
     success: bool
     message: str
     match_id: Optional[UUID4] = None
+
+
+class MatchFoundNotification(PydanticBaseModel):
+    """WebSocket payload sent to each player when a match is created."""
+
+    status: str = "match_found"
+    match_id: str
+    opponent_username: str
+    problem_id: Optional[str] = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class MatchQueueStatusResponse(PydanticBaseModel):
+    """Result of joining or leaving the matchmaking queue."""
+
+    status: str
+    message: str
+
+
+class MatchAcceptResponse(PydanticBaseModel):
+    status: str
+    match_id: UUID4
+    match_status: MatchStatus
+    player1_accepted: bool
+    player2_accepted: bool
+
+
+class MatchDeclineResponse(PydanticBaseModel):
+    status: str
+    match_id: UUID4
+    match_status: MatchStatus
+
+
+class ActiveMatchOpponent(PydanticBaseModel):
+    id: str
+    username: str
+    rating: int
+
+
+class ActiveMatchResponse(PydanticBaseModel):
+    """The caller's open match; only has_active_match is set when there is none."""
+
+    has_active_match: bool
+    match_id: Optional[UUID4] = None
+    status: Optional[MatchStatus] = None
+    opponent: Optional[ActiveMatchOpponent] = None
+    problem_id: Optional[UUID4] = None
+    start_time: Optional[datetime] = None
+    player_accepted: Optional[bool] = None
@@ -1,7 +1,7 @@
 from pydantic import UUID4
-from typing import List
+from typing import Dict, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class TestCase(BaseModel):
@@ -21,7 +21,7 @@ class TestCaseInput(BaseModel):
 class TestCaseCreate(BaseModel):
     """Schema for creating test cases for a problem"""
 
-    problem_id: str
+    problem_id: UUID4
     testcases: List[TestCaseInput]
 
 
@@ -30,3 +30,27 @@ class TestCaseResponse(BaseModel):
     testcase_count: int
     success: bool
     message: str
+
+
+class TestCaseUploadSessionCreate(BaseModel):
+    """Schema for requesting direct-to-storage upload URLs for test cases"""
+
+    problem_id: UUID4
+    testcase_count: int = Field(gt=0, le=1000)
+
+
+class TestCaseUploadUrls(BaseModel):
+    """Presigned PUT URLs for the input and output of one test case"""
+
+    number: int
+    input_url: str
+    output_url: str
+
+
+class TestCaseUploadSessionResponse(BaseModel):
+    session_id: UUID4
+    problem_id: UUID4
+    expires_in: int
+    # Headers the client must send with every PUT, as they are signed
+    headers: Dict[str, str]
+    uploads: List[TestCaseUploadUrls]
@@ -67,7 +67,7 @@ class BadRequestException(AppException):
 # Exception handlers
 async def app_exception_handler(request: Request, exc: AppException):
     """Handler for application-specific exceptions."""
-    logger.error(f"Application error: {exc.detail} (Status: {exc.status_code})")
+    logger.error("Application error: %s (Status: %s)", exc.detail, exc.status_code)
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
@@ -94,7 +94,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 async def pydantic_validation_exception_handler(request: Request, exc: ValidationError):
     """Handler for Pydantic validation errors."""
     errors = exc.errors()
-    logger.error(f"Pydantic validation error: {errors}")
+    logger.error("Pydantic validation error: %s", errors)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": errors},
@@ -103,7 +103,7 @@ async def pydantic_validation_exception_handler(request: Request, exc: Validatio
 
 async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     """Handler for SQLAlchemy errors."""
-    logger.error(f"Database error: {str(exc)}")
+    logger.error("Database error: %s", exc)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Database error occurred. Please try again later."},
@@ -112,7 +112,7 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
 
 async def general_exception_handler(request: Request, exc: Exception):
     """Handler for all other exceptions."""
-    logger.error(f"Unexpected error: {str(exc)}", exc_info=True)
+    logger.error("Unexpected error: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "An unexpected error occurred. Please try again later."},
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 
@@ -5,6 +6,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from src.presentation.routes import (
@@ -16,10 +18,15 @@ from src.presentation.routes import (
     profile_router,
     standing_router,
 )
+from src.business.services import run_match_timers, run_matchmaker
 from src.config import logger
 from src.data.repositories import get_redis_client, init_db
 from src.errors import register_exception_handlers
-from src.presentation.middleware.rate_limit import RateLimitMiddleware
+from src.presentation.middleware.rate_limit import (
+    RateLimitMiddleware,
+    load_rate_limit_script,
+)
+from src.presentation.websocket import run_notification_listener
 
 
 import uuid
@@ -31,25 +38,41 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         request.state.request_id = request_id
         origin = request.headers.get("origin")
         logger.info(
-            f"Request started: {request.method} {request.url.path} - "
-            f"ID: {request_id} - Client: {request.client.host} - Origin: {origin}"
+            "Request started: %s %s - "
+            "ID: %s - Client: %s - Origin: %s",
+            request.method,
+            request.url.path,
+            request_id,
+            request.client.host,
+            origin,
         )
         start_time = time.time()
         try:
             response = await call_next(request)
             process_time = time.time() - start_time
             logger.info(
-                f"Request completed: {request.method} {request.url.path} - "
-                f"ID: {request_id} - Status: {response.status_code} - "
-                f"Time: {process_time:.4f}s - Response headers: {response.headers}"
+                "Request completed: %s %s - "
+                "ID: %s - Status: %s - "
+                "Time: %.4fs - Response headers: %s",
+                request.method,
+                request.url.path,
+                request_id,
+                response.status_code,
+                process_time,
+                response.headers,
             )
             return response
         except Exception as e:
             process_time = time.time() - start_time
             logger.error(
-                f"Request failed: {request.method} {request.url.path} - "
-                f"ID: {request_id} - Error: {e} - "
-                f"Time: {process_time:.4f}s"
+                "Request failed: %s %s - "
+                "ID: %s - Error: %s - "
+                "Time: %.4fs",
+                request.method,
+                request.url.path,
+                request_id,
+                e,
+                process_time,
             )
             raise
 
@@ -57,16 +80,37 @@ class LoggingMiddleware(BaseHTTPMiddleware):
 @asynccontextmanager
 async def life_span(app: FastAPI):
     logger.info("Server is starting...")
+    background_tasks = []
     if os.environ.get("TESTING") != "True":
         try:
             await init_db()
             logger.info("Database initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize database: {e}")
+            logger.error("Failed to initialize database: %s", e)
             raise
+        # Open the shared Redis pool up front instead of on the first request
+        await redis_client.connect()
+        logger.info("Redis connection pool initialized")
+        try:
+            await load_rate_limit_script(redis_client)
+            logger.info("Rate limit script loaded")
+        except Exception as e:
+            # The middleware reloads the script on NOSCRIPT, so this is not fatal
+            logger.warning("Failed to preload rate limit script: %s", e)
+        # One matchmaker per worker, woken when players join its queue
+        background_tasks.append(asyncio.create_task(run_matchmaker()))
+        # Match timeouts live in Redis; every worker polls for due ones
+        background_tasks.append(asyncio.create_task(run_match_timers()))
+        # Notifications are published to Redis, so any worker can reach a socket
+        background_tasks.append(asyncio.create_task(run_notification_listener()))
     else:
         logger.info("Skipping database initialization for tests")
+    app.state.redis = redis_client
     yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await redis_client.close()
     logger.info("Server has been stopped")
 
 
@@ -77,6 +121,7 @@ app = FastAPI(
     description="A platform for 1-on-1 algorithmic competitions with a rating system and task topic management",
     version=version,
     lifespan=life_span,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS: дозволити будь-який піддомен vercel.app та localhost:3000 для розробки
@@ -111,4 +156,4 @@ app.include_router(submission_router, prefix=f"/api/{version}", tags=["submissio
 app.include_router(profile_router, prefix=f"/api/{version}", tags=["profile"])
 app.include_router(standing_router, prefix=f"/api/{version}", tags=["standing"])
 
-logger.info(f"Application startup complete - API version: {version}")
+logger.info("Application startup complete - API version: %s", version)
@@ -1,8 +1,11 @@
-import json
+import asyncio
 import logging
 import os
+from collections import defaultdict
 
+import orjson
 from aiokafka import AIOKafkaConsumer
+from aiokafka.coordinator.assignors.roundrobin import RoundRobinPartitionAssignor
 
 from src.presentation.websocket import manager
 
@@ -13,27 +16,65 @@ KAFKA_BOOTSTRAP_SERVERS = (
 )
 MATCH_EVENTS_TOPIC = os.getenv("MATCH_EVENTS_TOPIC", "match_events")
 
+# Explicit group timeouts: quick failure detection without rebalance loops
+# when a notifier is slow to poll
+CONSUMER_GROUP_SETTINGS = {
+    "session_timeout_ms": 30000,
+    "heartbeat_interval_ms": 3000,
+    "max_poll_interval_ms": 300000,
+    "request_timeout_ms": 40000,
+    "partition_assignment_strategy": (RoundRobinPartitionAssignor,),
+}
+
+
+async def _forward_user_events(user_id: str, payloads: list) -> None:
+    # Events for the same user are sent in order; different users run in parallel
+    for payload in payloads:
+        await manager.send_raw(user_id, payload)
+
 
 async def kafka_ws_consumer():
     consumer = AIOKafkaConsumer(
         MATCH_EVENTS_TOPIC,
         bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
-        value_deserializer=lambda m: json.loads(m.decode("utf-8")),
+        value_deserializer=orjson.loads,
         auto_offset_reset="earliest",
         enable_auto_commit=True,
         group_id="websocket_notifier",
+        **CONSUMER_GROUP_SETTINGS,
     )
     await consumer.start()
-    logger.info(f"Kafka WebSocket consumer started on topic {MATCH_EVENTS_TOPIC}")
+    logger.info("Kafka WebSocket consumer started on topic %s", MATCH_EVENTS_TOPIC)
     try:
-        async for msg in consumer:
-            event = msg.value
-            user_id = event.get("user_id")
-            payload = event.get("payload")
-            if user_id and payload:
-                logger.info(f"Forwarding Kafka event to WebSocket for user {user_id}")
-                await manager.send_match_notification(user_id, payload)
-            else:
-                logger.warning(f"Invalid event from Kafka: {event}")
+        while True:
+            batches = await consumer.getmany(timeout_ms=1000)
+            events_by_user = defaultdict(list)
+            for messages in batches.values():
+                for msg in messages:
+                    event = msg.value
+                    user_id = event.get("user_id")
+                    payload = event.get("payload")
+                    if user_id and payload:
+                        # Serialize once here; every socket of the user gets the same text
+                        events_by_user[user_id].append(orjson.dumps(payload).decode())
+                    else:
+                        logger.warning("Invalid event from Kafka: %s", event)
+
+            if not events_by_user:
+                continue
+
+            logger.info(
+                "Forwarding Kafka events to WebSocket for %s users", len(events_by_user)
+            )
+            await asyncio.gather(
+                *(
+                    _forward_user_events(user_id, payloads)
+                    for user_id, payloads in events_by_user.items()
+                ),
+                return_exceptions=True,
+            )
     finally:
+        # stop() sends LeaveGroup so the remaining members rebalance immediately
+        # instead of waiting for the session timeout
         await consumer.stop()
+        logger.info("Kafka WebSocket consumer stopped")
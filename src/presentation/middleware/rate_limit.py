@@ -1,40 +1,283 @@
-from fastapi import HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi.responses import ORJSONResponse
+from redis.exceptions import NoScriptError
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config import Config, logger
 from src.data.repositories.redis import RedisClient
 
+rate_limit_logger = logger.getChild("rate_limit")
+
+# Upper bound on locally remembered throttled clients
+DENY_CACHE_SIZE = 10_000
+
+# Stricter per-minute limits for endpoints that are attractive to brute force.
+# Every other path shares the client's default budget.
+ENDPOINT_RATE_LIMITS: Dict[str, int] = {
+    "/api/v1/auth/login": 10,
+    "/api/v1/auth/register": 5,
+}
+
+# Paths that are never rate limited (API docs, probes)
+EXEMPT_PATH_PREFIXES = ("/docs", "/redoc", "/openapi", "/health", "/metrics")
+
+# All counters of one client live in a single hash (rl:{ip}), so an active
+# IP costs one Redis key regardless of how many limited endpoints it hits.
+RATE_LIMIT_KEY_TEMPLATE = "rl:%s"
+
+# Approximate sliding window (two fixed-window counters, the previous one
+# weighted by how much of it still overlaps the sliding window). Each limit
+# owns three hash fields behind its prefix (ARGV[4]): c (current count),
+# p (previous count) and w (current window index).
+# ARGV[5] is the number of requests being checked at once. Returns
+# {admitted, estimated count after admitting them, milliseconds until the
+# first rejected request would fit (0 when all were admitted)}.
+RATE_LIMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local cost = tonumber(ARGV[5])
+local c_field = ARGV[4] .. 'c'
+local p_field = ARGV[4] .. 'p'
+local w_field = ARGV[4] .. 'w'
+local current_window = math.floor(now / window)
+local state = redis.call('HMGET', KEYS[1], c_field, p_field, w_field)
+local curr = tonumber(state[1]) or 0
+local prev = tonumber(state[2]) or 0
+local stored_window = tonumber(state[3]) or current_window
+if stored_window ~= current_window then
+    if stored_window == current_window - 1 then
+        prev = curr
+    else
+        prev = 0
+    end
+    curr = 0
+end
+local elapsed = now - current_window * window
+local count = prev * (1 - elapsed / window) + curr
+local admitted = math.max(0, math.min(cost, math.floor(limit - count)))
+curr = curr + admitted
+redis.call('HSET', KEYS[1], c_field, curr, p_field, prev, w_field, current_window)
+redis.call('EXPIRE', KEYS[1], window * 2)
+count = count + admitted
+if admitted == cost then
+    return {admitted, math.floor(count), 0}
+end
+local wait = window - elapsed
+if prev > 0 then
+    wait = math.min(wait, (count + 1 - limit) * window / prev)
+end
+return {admitted, math.floor(count), math.max(1, math.ceil(wait * 1000))}
+"""
+
+# EVALSHA digest is the SHA1 of the source, so it is known without asking Redis
+RATE_LIMIT_SCRIPT_SHA = hashlib.sha1(RATE_LIMIT_SCRIPT.encode()).hexdigest()
+
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, redis_client: RedisClient):
-        super().__init__(app)
+async def load_rate_limit_script(redis_client: RedisClient) -> str:
+    """Register the rate-limit script in Redis' script cache; called at startup."""
+    return await redis_client.script_load(RATE_LIMIT_SCRIPT)
+
+
+class _PendingCheck:
+    """Checks for one client limit that go to Redis in a single script call."""
+
+    __slots__ = ("size", "result")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.size = 0
+        self.result: asyncio.Future = loop.create_future()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware, so no per-request task group or body streams."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        redis_client: RedisClient,
+        endpoint_rate_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.app = app
         self.redis_client = redis_client
         self.rate_limit = 100  # Example: 100 requests per minute
         self.rate_limit_window = 60  # Time window in seconds
+        if endpoint_rate_limits is None:
+            endpoint_rate_limits = ENDPOINT_RATE_LIMITS
+        # Everything a request needs is resolved with one dict lookup:
+        # (limit, hash field prefix, count at which 80% of the budget is used)
+        self._default_config = self._limit_config(self.rate_limit, "")
+        self._path_config: Dict[str, Tuple[int, str, int]] = {
+            path: self._limit_config(limit, path + ":")
+            for path, limit in endpoint_rate_limits.items()
+        }
+        self.trust_proxy_headers = Config.TRUST_PROXY_HEADERS
+        self.trusted_proxy_count = Config.TRUSTED_PROXY_COUNT
+        # (key, field prefix) -> monotonic time until which the client is
+        # known to be throttled
+        self._deny_cache: OrderedDict[Tuple[str, str], float] = OrderedDict()
+        # Concurrent checks of the same (key, field prefix) are coalesced: at
+        # most one script call is in flight, and requests arriving meanwhile
+        # join the next call, which counts all of them at once.
+        self._open_checks: Dict[Tuple[str, str], _PendingCheck] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _limit_config(limit: int, field_prefix: str) -> Tuple[int, str, int]:
+        return limit, field_prefix, int(limit * 0.8)
+
+    async def _run_script(
+        self, key: str, field_prefix: str, limit: int, cost: int
+    ) -> List[int]:
+        args = (time.time(), self.rate_limit_window, limit, field_prefix, cost)
+        try:
+            return await self.redis_client.evalsha(
+                RATE_LIMIT_SCRIPT_SHA, 1, key, *args
+            )
+        except NoScriptError:
+            # Script cache was flushed (e.g. Redis restart): reload and retry once
+            await load_rate_limit_script(self.redis_client)
+            return await self.redis_client.evalsha(
+                RATE_LIMIT_SCRIPT_SHA, 1, key, *args
+            )
+
+    async def _check(self, check_key: Tuple[str, str], limit: int) -> int:
+        """Return the estimated request count, or -ms to wait when throttled."""
+        pending = self._open_checks.get(check_key)
+        if pending is None:
+            pending = _PendingCheck(asyncio.get_running_loop())
+            self._open_checks[check_key] = pending
+            task = asyncio.create_task(self._flush(check_key, pending, limit))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+            # A task cancelled before it starts never runs _flush's finally
+            task.add_done_callback(lambda _: self._close_check(check_key, pending))
+        index = pending.size
+        pending.size += 1
+
+        # Shielded so a disconnecting client cannot cancel the shared call
+        admitted, count, wait_ms = await asyncio.shield(pending.result)
+        if index < admitted:
+            return count - admitted + index + 1
+        return -wait_ms
+
+    async def _flush(
+        self, check_key: Tuple[str, str], pending: _PendingCheck, limit: int
+    ) -> None:
+        previous = self._inflight.get(check_key)
+        self._inflight[check_key] = pending.result
+        try:
+            if previous is not None:
+                # Keep collecting checks until the earlier call for this key returns
+                await asyncio.wait((previous,))
+            del self._open_checks[check_key]
+            pending.result.set_result(
+                await self._run_script(*check_key, limit, pending.size)
+            )
+        except Exception as e:
+            pending.result.set_exception(e)
+        finally:
+            self._close_check(check_key, pending)
+
+    def _close_check(self, check_key: Tuple[str, str], pending: _PendingCheck) -> None:
+        """
+        Release a flushed batch. Also runs when the flush is cancelled (e.g. on
+        shutdown): the batch must not stay open, and its waiters must not hang
+        on the shared result.
+        """
+        if self._open_checks.get(check_key) is pending:
+            del self._open_checks[check_key]
+        if not pending.result.done():
+            pending.result.set_exception(RuntimeError("Rate limit check was cancelled"))
+        if self._inflight.get(check_key) is pending.result:
+            del self._inflight[check_key]
+
+    @staticmethod
+    def _too_many_requests() -> ORJSONResponse:
+        return ORJSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded. Please try again later."},
+        )
+
+    def _client_ip(self, scope: Scope) -> str:
+        if self.trust_proxy_headers:
+            # Entries left of what our own proxies appended are client-supplied
+            # and can be spoofed, so count hops from the right
+            forwarded = [
+                entry.strip()
+                for name, value in scope["headers"]
+                if name == b"x-forwarded-for"
+                for entry in value.split(b",")
+            ]
+            if 0 < self.trusted_proxy_count <= len(forwarded):
+                forwarded_ip = forwarded[-self.trusted_proxy_count]
+                if forwarded_ip:
+                    return forwarded_ip.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _remember_denied(self, key: Tuple[str, str], until: float) -> None:
+        self._deny_cache[key] = until
+        self._deny_cache.move_to_end(key)
+        if len(self._deny_cache) > DENY_CACHE_SIZE:
+            self._deny_cache.popitem(last=False)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # A single C-level startswith over the whole tuple
+        path = scope["path"]
+        if path.startswith(EXEMPT_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
         # Get client IP or user identifier
-        client_ip = request.client.host
-        key = f"rate_limit:{client_ip}"
+        client_ip = self._client_ip(scope)
+        limit, field_prefix, warn_threshold = self._path_config.get(
+            path, self._default_config
+        )
+        key = RATE_LIMIT_KEY_TEMPLATE % client_ip
+        check_key = (key, field_prefix)
+
+        # Clients already known to be throttled are rejected without touching Redis
+        now = time.monotonic()
+        denied_until = self._deny_cache.get(check_key)
+        if denied_until is not None:
+            if denied_until > now:
+                await self._too_many_requests()(scope, receive, send)
+                return
+            del self._deny_cache[check_key]
 
-        # Increment request count in Redis
         try:
-            request_count = await self.redis_client.incr(key)
-            if request_count == 1:
-                # Set expiry for the key if it's the first request
-                await self.redis_client.set(
-                    key, request_count, ex=self.rate_limit_window
-                )
-
-            # Check if rate limit is exceeded
-            if request_count > self.rate_limit:
-                raise HTTPException(
-                    status_code=429,
-                    detail="Rate limit exceeded. Please try again later.",
-                )
+            request_count = await self._check(check_key, limit)
         except Exception as e:
             # Log error but don't block the request if Redis fails
-            print(f"Rate limit error: {str(e)}")
+            rate_limit_logger.error("Rate limit error: %s", e)
+            request_count = None
+
+        # Log only on the request that crosses the threshold, not on every one after
+        if request_count == warn_threshold:
+            rate_limit_logger.info(
+                "Client approaching rate limit: ip=%s path=%s limit=%s/%ss",
+                client_ip,
+                path,
+                limit,
+                self.rate_limit_window,
+            )
+
+        # Check if rate limit is exceeded
+        if request_count is not None and request_count < 0:
+            self._remember_denied(check_key, now - request_count / 1000)
+            await self._too_many_requests()(scope, receive, send)
+            return
 
         # Proceed with the request
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
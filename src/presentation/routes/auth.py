@@ -8,7 +8,6 @@ from src.business.services import (
     UserService,
     create_access_token,
     create_refresh_token,
-    get_user_service,
     verify_password,
 )
 from src.config import Config, logger
@@ -19,6 +18,25 @@ from src.errors import AuthenticationException, AuthorizationException
 auth_logger = logger.getChild("auth")
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
+# UserService is stateless, so one instance serves every request
+user_service = UserService()
+
+# Cookie settings are fixed for the process lifetime, so build them once
+_ACCESS_COOKIE_KWARGS = dict(
+    key="access_token",
+    max_age=Config.JWT_ACCESS_TOKEN_EXPIRY,
+    httponly=True,
+    secure=True,
+    samesite="none",
+)
+_REFRESH_COOKIE_KWARGS = dict(
+    key="refresh_token",
+    max_age=Config.JWT_REFRESH_TOKEN_EXPIRY,
+    httponly=True,
+    secure=True,
+    samesite="none",
+)
+
 
 @auth_router.post(
     "/register",
@@ -30,20 +48,19 @@ auth_router = APIRouter(prefix="/auth", tags=["auth"])
 async def create_user(
     user_data: UserCreateModel,
     response: Response,
-    user_service: UserService = Depends(get_user_service),
     session: AsyncSession = Depends(get_session),
 ):
-    auth_logger.info(f"Registration attempt for username: {user_data.username}")
+    auth_logger.info("Registration attempt for username: %s", user_data.username)
     user_exists = await user_service.get_user_by_username(user_data.username, session)
     if user_exists:
-        auth_logger.warning(f"Username already exists: {user_data.username}")
+        auth_logger.warning("Username already exists: %s", user_data.username)
         raise AuthorizationException(detail="User with this username already exists")
 
     new_user = await user_service.create_user(user_data, session)
     access_token, refresh_token = generate_tokens_for_user(new_user)
     await user_service.update_refresh_token(new_user.id, refresh_token, session)
     set_auth_cookies(response, access_token, refresh_token)
-    auth_logger.info(f"User registered: {new_user.username} (ID: {new_user.id})")
+    auth_logger.info("User registered: %s (ID: %s)", new_user.username, new_user.id)
     return new_user
 
 
@@ -56,19 +73,18 @@ async def create_user(
 async def login(
     login_data: UserLoginModel,
     response: Response,
-    user_service: UserService = Depends(get_user_service),
     session: AsyncSession = Depends(get_session),
 ):
-    auth_logger.info(f"Login attempt for username: {login_data.username}")
+    auth_logger.info("Login attempt for username: %s", login_data.username)
     user = await user_service.get_user_by_username(login_data.username, session)
     if not user or not verify_password(login_data.password, user.password_hash):
-        auth_logger.warning(f"Invalid credentials for username: {login_data.username}")
+        auth_logger.warning("Invalid credentials for username: %s", login_data.username)
         raise AuthenticationException(detail="Invalid credentials")
 
     access_token, refresh_token = generate_tokens_for_user(user)
     await user_service.update_refresh_token(user.id, refresh_token, session)
     set_auth_cookies(response, access_token, refresh_token)
-    auth_logger.info(f"User logged in: {user.username} (ID: {user.id})")
+    auth_logger.info("User logged in: %s (ID: %s)", user.username, user.id)
     return user
 
 
@@ -80,22 +96,21 @@ async def login(
 async def update_tokens(
     response: Response,
     token_details: dict = Depends(RefreshTokenFromCookie()),
-    user_service: UserService = Depends(get_user_service),
     redis_client: RedisClient = Depends(get_redis_client),
     session: AsyncSession = Depends(get_session),
 ):
     user_id = token_details["user"]["id"]
-    auth_logger.info(f"Token refresh attempt for user ID: {user_id}")
-    user = await user_service.get_user_by_id(user_id, session)
+    auth_logger.info("Token refresh attempt for user ID: %s", user_id)
+    user = await user_service.get_cached_user(user_id, session)
     if not user:
-        auth_logger.warning(f"User not found: ID {user_id}")
+        auth_logger.warning("User not found: ID %s", user_id)
         raise AuthenticationException(detail="Invalid credentials")
 
     await redis_client.add_jti_to_blocklist(token_details["jti"])
     access_token, refresh_token = generate_tokens_for_user(user)
     await user_service.update_refresh_token(user.id, refresh_token, session)
     set_auth_cookies(response, access_token, refresh_token)
-    auth_logger.info(f"Tokens refreshed for user: {user.username} (ID: {user.id})")
+    auth_logger.info("Tokens refreshed for user: %s (ID: %s)", user.username, user.id)
     return {"message": "Tokens refreshed"}
 
 
@@ -106,15 +121,14 @@ async def update_tokens(
     description="Returns the data of the currently authenticated user based on the access token.",
 )
 async def get_current_user(
-    user_service: UserService = Depends(get_user_service),
     session: AsyncSession = Depends(get_session),
     token_data: dict = Depends(AccessTokenFromCookie()),
 ):
     user_id = token_data["user"]["id"]
-    auth_logger.debug(f"Fetching data for user ID: {user_id}")
-    user = await user_service.get_user_by_id(user_id, session)
+    auth_logger.debug("Fetching data for user ID: %s", user_id)
+    user = await user_service.get_cached_user(user_id, session)
     if not user:
-        auth_logger.warning(f"User not found: ID {user_id}")
+        auth_logger.warning("User not found: ID %s", user_id)
         raise AuthenticationException(detail="User not found")
     return user
 
@@ -132,9 +146,10 @@ async def revoke_token(
     redis_client: RedisClient = Depends(get_redis_client),
 ):
     user_id = refresh_token_details["user"]["id"]
-    auth_logger.info(f"Logout attempt for user ID: {user_id}")
-    await redis_client.add_jti_to_blocklist(refresh_token_details["jti"])
-    await redis_client.add_jti_to_blocklist(access_token_details["jti"])
+    auth_logger.info("Logout attempt for user ID: %s", user_id)
+    await redis_client.add_jtis_to_blocklist(
+        [refresh_token_details["jti"], access_token_details["jti"]]
+    )
     response = JSONResponse(content={"message": "Logged out successfully"})
     response.delete_cookie(
         key="access_token", httponly=True, secure=True, samesite="strict"
@@ -142,7 +157,7 @@ async def revoke_token(
     response.delete_cookie(
         key="refresh_token", httponly=True, secure=True, samesite="strict"
     )
-    auth_logger.info(f"User logged out: ID {user_id}")
+    auth_logger.info("User logged out: ID %s", user_id)
     return response
 
 
@@ -155,19 +170,5 @@ def generate_tokens_for_user(user) -> tuple[str, str]:
 
 
 def set_auth_cookies(response: Response, access_token: str, refresh_token: str) -> None:
-    response.set_cookie(
-        key="access_token",
-        value=access_token,
-        max_age=Config.JWT_ACCESS_TOKEN_EXPIRY,
-        httponly=True,
-        secure=True,
-        samesite="none",
-    )
-    response.set_cookie(
-        key="refresh_token",
-        value=refresh_token,
-        max_age=Config.JWT_REFRESH_TOKEN_EXPIRY,
-        httponly=True,
-        secure=True,
-        samesite="none",
-    )
+    response.set_cookie(value=access_token, **_ACCESS_COOKIE_KWARGS)
+    response.set_cookie(value=refresh_token, **_REFRESH_COOKIE_KWARGS)
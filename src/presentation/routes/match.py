@@ -1,22 +1,24 @@
-import asyncio
+import logging
 import uuid
-from datetime import datetime
 
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
-    Depends,
     Request,
     WebSocket,
-    WebSocketDisconnect,
 )
-from sqlalchemy import or_, select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from src.data.schemas import User, UserBaseResponse
-from src.config import logger, Config
-from src.data.repositories import get_session
+from starlette.websockets import WebSocketState
+
+from src.data.schemas import UserBaseResponse
+from src.config import logger
+from src.data.repositories import (
+    DB_UTC_NOW,
+    DbSession,
+    get_match_for_participant,
+    get_open_match_with_opponent,
+    get_rating_if_free,
+    transition_match,
+)
 from src.data.schemas.match import CapitulateRequest
 from src.errors import (
     AuthorizationException,
@@ -26,16 +28,24 @@ from src.errors import (
     ValidationException,
 )
 
-from src.data.schemas import AcceptMatchRequest, FindMatchRequest, Match, MatchStatus
+from src.data.schemas import (
+    AcceptMatchRequest,
+    ActiveMatchResponse,
+    FindMatchRequest,
+    MatchAcceptResponse,
+    MatchDeclineResponse,
+    MatchQueueStatusResponse,
+    MatchStatus,
+)
 from src.business.services.match import (
     add_player_to_queue,
-    process_match_queue,
     send_match_notification,
+    send_match_found_notification,
     capitulate_match_logic,
     remove_player_from_queue,
     accept_match_service,
 )
-from src.business.services.auth_dependency import get_current_user
+from src.business.services.auth_dependency import CurrentUser, ExistingUser
 from src.presentation.websocket import manager
 
 # Create a module-specific logger
@@ -44,79 +54,26 @@ match_logger = logger.getChild("match")
 router = APIRouter(prefix="/match", tags=["match"])
 
 
-async def match_acceptance_timeout(match_id: str, db: AsyncSession):
-    await asyncio.sleep(Config.MATCH_ACCEPT_TIMEOUT_SECONDS)
-    result = await db.execute(select(Match).where(Match.id == uuid.UUID(match_id)))
-    match = result.scalars().first()
-    if match and match.status == MatchStatus.PENDING:
-        # Determine who did not accept
-        not_accepted = []
-        if not match.player1_accepted:
-            not_accepted.append(str(match.player1_id))
-        if not match.player2_accepted:
-            not_accepted.append(str(match.player2_id))
-        match.status = MatchStatus.CANCELLED
-        match.end_time = datetime.utcnow()
-        db.add(match)
-        await db.commit()
-        # Get usernames
-        result1 = await db.execute(select(User).where(User.id == match.player1_id))
-        player1 = result1.scalar_one_or_none()
-        result2 = await db.execute(select(User).where(User.id == match.player2_id))
-        player2 = result2.scalar_one_or_none()
-        for user, other in [(player1, player2), (player2, player1)]:
-            if user:
-                await send_match_notification(
-                    str(user.id),
-                    {
-                        "status": "match_cancelled",
-                        "match_id": str(match.id),
-                        "reason": (
-                            f"User '{other.username}' did not accept in time"
-                            if other
-                            and not (
-                                match.player1_accepted
-                                if user == player1
-                                else match.player2_accepted
-                            )
-                            else "You did not accept in time"
-                        ),
-                    },
-                )
-
-
-async def match_draw_timeout(match_id: str, db: AsyncSession):
-    await asyncio.sleep(Config.MATCH_DURATION_SECONDS)
-    result = await db.execute(select(Match).where(Match.id == uuid.UUID(match_id)))
-    match = result.scalars().first()
-    if match and match.status == MatchStatus.ACTIVE:
-        match.status = MatchStatus.COMPLETED
-        match.end_time = datetime.utcnow()
-        db.add(match)
-        await db.commit()
-        # Get usernames
-        result1 = await db.execute(select(User).where(User.id == match.player1_id))
-        player1 = result1.scalar_one_or_none()
-        result2 = await db.execute(select(User).where(User.id == match.player2_id))
-        player2 = result2.scalar_one_or_none()
-        for user in [player1, player2]:
-            if user:
-                await send_match_notification(
-                    str(user.id),
-                    {
-                        "status": "match_draw",
-                        "match_id": str(match.id),
-                        "message": "Match ended in a draw. No one submitted a correct solution in 45 minutes.",
-                    },
-                )
-
-
-@router.post("/find")
+def resolve_own_user_id(
+    user_id: uuid.UUID, current_user: UserBaseResponse, action: str
+) -> uuid.UUID:
+    """
+    Make sure the user ID sent by the client is the caller's own.
+    Its format has already been validated when the request was parsed.
+    """
+    if user_id != current_user.id:
+        match_logger.warning(
+            "%s failed: User %s acted on behalf of %s", action, current_user.id, user_id
+        )
+        raise AuthorizationException(detail="You can only act on your own behalf")
+    return user_id
+
+
+@router.post("/find", response_model=MatchQueueStatusResponse)
 async def find_match(
     request_data: FindMatchRequest,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_session),
-    current_user: UserBaseResponse = Depends(get_current_user),
+    current_user: CurrentUser,
+    db: DbSession,
     request: Request = None,
 ):
     """
@@ -125,66 +82,40 @@ async def find_match(
     Players can only have one active or pending match at a time.
     """
     user_id = request_data.user_id
-    match_logger.info(f"Match finding request for user ID: {user_id}")
+    match_logger.info("Match finding request for user ID: %s", user_id)
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            match_logger.warning(
-                f"Match finding failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
+        user_uuid = resolve_own_user_id(user_id, current_user, "Match finding")
 
-        # Check if user exists
-        result = await db.execute(select(User).where(User.id == user_uuid))
-        user = result.scalar_one_or_none()
-        if not user:
-            match_logger.warning(f"Match finding failed: User not found: {user_id}")
+        # Check that the user exists and has no open match in one query
+        row = await get_rating_if_free(db, user_uuid)
+        if not row:
+            match_logger.warning("Match finding failed: User not found: %s", user_id)
             raise ResourceNotFoundException(detail="User not found")
 
-        # Check if user already has an active or pending match
-        result = await db.execute(
-            select(Match).where(
-                or_(
-                    Match.player1_id == user_uuid,
-                    Match.player2_id == user_uuid,
-                ),
-                or_(
-                    Match.status == MatchStatus.ACTIVE,
-                    Match.status == MatchStatus.PENDING,
-                    Match.status == MatchStatus.CREATED,
-                ),
-            )
-        )
-        active_match = result.scalars().first()
-
-        if active_match:
+        rating, has_open_match = row
+        if has_open_match:
             match_logger.warning(
-                f"Match finding failed: User already has an active match: {user_id}"
+                "Match finding failed: User already has an active match: %s", user_id
             )
             raise ValidationException(
                 detail="You already have an active or pending match"
             )
 
         # Add player to queue (returns True if added, False if already in queue)
-        added = await add_player_to_queue(user_uuid, user.rating)
+        added = await add_player_to_queue(user_uuid, rating)
         if not added:
-            match_logger.info(f"User {user_id} is already searching for a match.")
+            match_logger.info("User %s is already searching for a match.", user_id)
             return {
                 "status": "already_searching",
                 "message": "You are already searching for a match",
             }
-        match_logger.info(f"User added to match queue: {user_id}")
-
-        # Process match queue in background, pass the timeout callback
-        background_tasks.add_task(
-            process_match_queue, db, match_acceptance_timeout, match_draw_timeout
-        )
+        # Adding the player wakes the matchmaker task
+        match_logger.info("User added to match queue: %s", user_id)
 
         return {"status": "queued", "message": "You have been added to the match queue"}
     except (
+        AuthorizationException,
         BadRequestException,
         ResourceNotFoundException,
         ValidationException,
@@ -192,32 +123,34 @@ async def find_match(
     ) as e:
         raise e
     except Exception as e:
-        match_logger.error(f"Unexpected error during match finding: {str(e)}")
+        match_logger.error("Unexpected error during match finding: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
 
 
-@router.post("/accept")
+@router.post("/accept", response_model=MatchAcceptResponse)
 async def accept_match(
     request_data: AcceptMatchRequest,
-    db: AsyncSession = Depends(get_session),
-    current_user: UserBaseResponse = Depends(get_current_user),
+    current_user: CurrentUser,
+    db: DbSession,
     request: Request = None,
 ):
     """
     Accept a match invitation.
     Both players must accept for the match to start.
     """
-    user_id = str(current_user.id)  # Використовуємо ID автентифікованого користувача
+    user_id = current_user.id  # Використовуємо ID автентифікованого користувача
     match_id = request_data.match_id
     match_logger.info(
-        f"Match acceptance request for user ID: {user_id}, match ID: {match_id}"
+        "Match acceptance request for user ID: %s, match ID: %s", user_id, match_id
     )
 
     try:
         # Викликаємо шар бізнес-логіки для обробки прийняття матчу
         result = await accept_match_service(db, match_id, user_id)
         match_logger.info(
-            f"Match acceptance processed successfully: user={user_id}, match={match_id}"
+            "Match acceptance processed successfully: user=%s, match=%s",
+            user_id,
+            match_id,
         )
         return result
     except (
@@ -229,21 +162,22 @@ async def accept_match(
     ) as e:
         raise e
     except SQLAlchemyError as e:
-        match_logger.error(f"Database error during match acceptance: {str(e)}")
+        match_logger.error("Database error during match acceptance: %s", e)
         await db.rollback()
         raise DatabaseException(detail="Database error occurred")
     except Exception as e:
-        match_logger.error(f"Unexpected error during match acceptance: {str(e)}")
+        match_logger.error("Unexpected error during match acceptance: %s", e)
         await db.rollback()
         raise DatabaseException(detail="An unexpected error occurred")
 
 
-@router.post("/decline/{match_id}")
+@router.post("/decline/{match_id}", response_model=MatchDeclineResponse)
 async def decline_match(
-    match_id: str,
-    user_id: str,
-    db: AsyncSession = Depends(get_session),
-    current_user: UserBaseResponse = Depends(get_current_user),
+    match_id: uuid.UUID,
+    user_id: uuid.UUID,
+    user: ExistingUser,
+    current_user: CurrentUser,
+    db: DbSession,
     request: Request = None,
 ):
     """
@@ -251,52 +185,47 @@ async def decline_match(
     If either player declines, the match is cancelled.
     """
     match_logger.info(
-        f"Match decline request for user ID: {user_id}, match ID: {match_id}"
+        "Match decline request for user ID: %s, match ID: %s", user_id, match_id
     )
 
     try:
-        # Convert IDs to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-            match_uuid = uuid.UUID(match_id)
-        except ValueError:
-            match_logger.warning(
-                f"Match decline failed: Invalid ID format: user={user_id}, match={match_id}"
-            )
-            raise BadRequestException(detail="Invalid ID format")
-
-        # Check if user exists
-        result = await db.execute(select(User).where(User.id == user_uuid))
-        user = result.scalar_one_or_none()
-        if not user:
-            match_logger.warning(f"Match decline failed: User not found: {user_id}")
-            raise ResourceNotFoundException(detail="User not found")
+        user_uuid = resolve_own_user_id(user_id, current_user, "Match decline")
 
-        # Check if match exists
-        result = await db.execute(select(Match).where(Match.id == match_uuid))
-        match = result.scalars().first()
+        # Fetch the match only if the user is part of it
+        match = await get_match_for_participant(db, match_id, user_uuid)
         if not match:
-            match_logger.warning(f"Match decline failed: Match not found: {match_id}")
-            raise ResourceNotFoundException(detail="Match not found")
-
-        # Check if user is part of the match
-        if match.player1_id != user_uuid and match.player2_id != user_uuid:
             match_logger.warning(
-                f"Match decline failed: User not part of match: user={user_id}, match={match_id}"
+                "Match decline failed: Match not found or user not part of it: "
+                "user=%s, match=%s",
+                user_id,
+                match_id,
             )
             raise AuthorizationException(detail="You are not part of this match")
 
         # Check if match is in the correct state
         if match.status != MatchStatus.PENDING:
             match_logger.warning(
-                f"Match decline failed: Match not in PENDING state: {match_id}, current state: {match.status}"
+                "Match decline failed: Match not in PENDING state: %s, current state: %s",
+                match_id,
+                match.status,
             )
             raise ValidationException(detail="Match is not in a pending state")
 
-        # Update match status
-        match.status = MatchStatus.DECLINED
-        match.end_time = datetime.utcnow()
-        match_logger.info(f"Match declined: {match_id} by user {user_id}")
+        # Update match status, unless it changed since it was read
+        if not await transition_match(
+            db,
+            match_id,
+            MatchStatus.PENDING,
+            status=MatchStatus.DECLINED,
+            end_time=DB_UTC_NOW,
+        ):
+            match_logger.warning(
+                "Match decline failed: Match %s left PENDING state concurrently",
+                match_id,
+            )
+            raise ValidationException(detail="Match is not in a pending state")
+        await db.commit()
+        match_logger.info("Match declined: %s by user %s", match_id, user_id)
 
         # Notify the other player
         other_player_id = (
@@ -308,21 +237,18 @@ async def decline_match(
             other_player_id,
             {
                 "status": "match_declined",
-                "match_id": str(match.id),
-                "declined_by": str(user_uuid),
+                "match_id": match.id,
+                "declined_by": user_uuid,
             },
         )
 
-        # Commit changes
-        db.add(match)
-        await db.commit()
         match_logger.info(
-            f"Match decline processed successfully: user={user_id}, match={match_id}"
+            "Match decline processed successfully: user=%s, match=%s", user_id, match_id
         )
 
         return {
             "status": "declined",
-            "match_id": str(match.id),
+            "match_id": match.id,
             "match_status": match.status,
         }
     except (
@@ -334,85 +260,57 @@ async def decline_match(
     ) as e:
         raise e
     except SQLAlchemyError as e:
-        match_logger.error(f"Database error during match decline: {str(e)}")
+        match_logger.error("Database error during match decline: %s", e)
         await db.rollback()
         raise DatabaseException(detail="Database error occurred")
     except Exception as e:
-        match_logger.error(f"Unexpected error during match decline: {str(e)}")
+        match_logger.error("Unexpected error during match decline: %s", e)
         await db.rollback()
         raise DatabaseException(detail="An unexpected error occurred")
 
 
-@router.get("/active/{user_id}")
+@router.get(
+    "/active/{user_id}",
+    response_model=ActiveMatchResponse,
+    response_model_exclude_unset=True,
+)
 async def get_active_match(
-    user_id: str, db: AsyncSession = Depends(get_session), request: Request = None
+    user_id: uuid.UUID, user: ExistingUser, db: DbSession, request: Request = None
 ):
     """
     Get the active match for a user.
     """
-    match_logger.info(f"Active match request for user ID: {user_id}")
+    match_logger.info("Active match request for user ID: %s", user_id)
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            match_logger.warning(
-                f"Active match request failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
-
-        # Check if user exists
-        result = await db.execute(select(User).where(User.id == user_uuid))
-        user = result.scalar_one_or_none()
-        if not user:
-            match_logger.warning(
-                f"Active match request failed: User not found: {user_id}"
-            )
-            raise ResourceNotFoundException(detail="User not found")
+        user_uuid = user.id
 
-        # Find active match
-        result = await db.execute(
-            select(Match).where(
-                or_(
-                    Match.player1_id == user_uuid,
-                    Match.player2_id == user_uuid,
-                ),
-                or_(
-                    Match.status == MatchStatus.ACTIVE,
-                    Match.status == MatchStatus.PENDING,
-                    Match.status == MatchStatus.CREATED,
-                ),
-            )
-        )
-        active_match = result.scalars().first()
+        # Find active match together with the opponent's details
+        row = await get_open_match_with_opponent(db, user_uuid)
 
-        if not active_match:
-            match_logger.info(f"No active match found for user: {user_id}")
+        if not row:
+            match_logger.info("No active match found for user: %s", user_id)
             return {"has_active_match": False}
 
-        # Get opponent details
+        active_match, opponent_username, opponent_rating = row
         opponent_id = (
             active_match.player2_id
             if active_match.player1_id == user_uuid
             else active_match.player1_id
         )
-        result = await db.execute(select(User).where(User.id == opponent_id))
-        opponent = result.scalar_one_or_none()
+        found_opponent = opponent_username is not None
 
-        match_logger.info(f"Active match found for user: {user_id}")
+        match_logger.info("Active match found for user: %s", user_id)
         return {
             "has_active_match": True,
-            "match_id": str(active_match.id),
+            "match_id": active_match.id,
             "status": active_match.status,
             "opponent": {
-                "id": str(opponent.id) if opponent else "",
-                "username": opponent.username if opponent else "",
-                "rating": opponent.rating if opponent else 0,
+                "id": str(opponent_id) if found_opponent else "",
+                "username": opponent_username if found_opponent else "",
+                "rating": opponent_rating if found_opponent else 0,
             },
-            "problem_id": (
-                str(active_match.problem_id) if active_match.problem_id else None
-            ),
+            "problem_id": active_match.problem_id,
             "start_time": active_match.start_time,
             "player_accepted": (
                 active_match.player1_accepted
@@ -423,7 +321,7 @@ async def get_active_match(
     except (BadRequestException, ResourceNotFoundException, DatabaseException) as e:
         raise e
     except Exception as e:
-        match_logger.error(f"Unexpected error during active match request: {str(e)}")
+        match_logger.error("Unexpected error during active match request: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
 
 
@@ -431,81 +329,87 @@ async def get_active_match(
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """
     WebSocket endpoint for real-time match notifications.
+
+    The server runs with permessage-deflate disabled (--ws-per-message-deflate
+    false): notifications are short JSON frames that barely compress, while a
+    deflate context costs roughly 50 KiB of memory per open connection.
     """
-    match_logger.info(f"WebSocket connection request for user ID: {user_id}")
+    match_logger.info("WebSocket connection request for user ID: %s", user_id)
 
     try:
-        await manager.connect(websocket, user_id)
-        match_logger.info(f"WebSocket connection established for user ID: {user_id}")
+        if not await manager.connect(websocket, user_id):
+            return
+        match_logger.info("WebSocket connection established for user ID: %s", user_id)
 
         try:
+            # The socket is push-only: client frames are read just to keep the
+            # connection open, and the disconnect arrives as a regular message
+            # instead of an exception
             while True:
-                # Wait for messages from the client
-                # This keeps the connection open
-                data = await websocket.receive_text()
-                match_logger.debug(f"Received message from user {user_id}: {data}")
-        except WebSocketDisconnect:
-            match_logger.info(f"WebSocket disconnected for user ID: {user_id}")
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                # Skip the logging call entirely unless DEBUG is on for this logger
+                if match_logger.isEnabledFor(logging.DEBUG):
+                    match_logger.debug(
+                        "Received message from user %s: %s",
+                        user_id,
+                        message.get("text") or message.get("bytes"),
+                    )
+            match_logger.info("WebSocket disconnected for user ID: %s", user_id)
+        finally:
+            # Unregister on every exit path, not only a clean disconnect
             manager.disconnect(websocket, user_id)
     except Exception as e:
-        match_logger.error(f"WebSocket error for user {user_id}: {str(e)}")
-        if websocket.client_state == websocket.client_state.CONNECTED:
+        match_logger.error("WebSocket error for user %s: %s", user_id, e)
+        if websocket.client_state == WebSocketState.CONNECTED:
             await websocket.close(code=1011, reason=f"Internal server error: {str(e)}")
 
 
-async def notify_match_found(match, user_id, opponent_id, db: AsyncSession):
+async def notify_match_found(match, user_id, opponent_id, opponent_username):
     # Only send if match.id and match.problem_id are valid
+    # The caller already has the opponent's username, so no lookup is needed
     if match.id and match.problem_id:
-        # Get opponent username
-        result = await db.execute(select(User).where(User.id == opponent_id))
-        opponent = result.scalar_one_or_none()
-        await send_match_notification(
+        await send_match_found_notification(
             user_id,
-            {
-                "status": "match_found",
-                "match_id": str(match.id),
-                "opponent_username": opponent.username if opponent else "",
-                "problem_id": str(match.problem_id),
-            },
+            str(match.id),
+            opponent_username or "",
+            str(match.problem_id),
         )
     else:
         match_logger.warning(
-            f"Not sending match_found notification due to missing match_id/problem_id: "
-            f"match_id={match.id}, problem_id={match.problem_id}, user_id={user_id}, opponent_id={opponent_id}"
+            "Not sending match_found notification due to missing match_id/problem_id: "
+            "match_id=%s, problem_id=%s, user_id=%s, opponent_id=%s",
+            match.id,
+            match.problem_id,
+            user_id,
+            opponent_id,
         )
 
 
 @router.post("/capitulate")
 async def capitulate_match(
     request: CapitulateRequest,
-    db: AsyncSession = Depends(get_session),
-    current_user: UserBaseResponse = Depends(get_current_user),
+    current_user: CurrentUser,
+    db: DbSession,
 ):
     try:
         await capitulate_match_logic(db, request.match_id, current_user.id)
         return {"message": "Match capitulated successfully."}
     except Exception as e:
-        match_logger.error(f"Failed to capitulate match: {e}")
+        match_logger.error("Failed to capitulate match: %s", e)
         raise BadRequestException("Could not capitulate match.")
 
 
-@router.post("/cancel_find")
-async def cancel_find_match(
-    request_data: FindMatchRequest,
-    current_user: UserBaseResponse = Depends(get_current_user),
-):
+@router.post("/cancel_find", response_model=MatchQueueStatusResponse)
+async def cancel_find_match(request_data: FindMatchRequest, current_user: CurrentUser):
     """
     Cancel matchmaking search for a user (remove from queue).
     """
     user_id = request_data.user_id
-    match_logger.info(f"Cancel find request for user ID: {user_id}")
-
-    try:
-        user_uuid = uuid.UUID(user_id)
-    except ValueError:
-        match_logger.warning(f"Cancel find failed: Invalid user ID format: {user_id}")
-        raise BadRequestException(detail="Invalid user ID format")
+    match_logger.info("Cancel find request for user ID: %s", user_id)
 
+    user_uuid = resolve_own_user_id(user_id, current_user, "Cancel find")
     removed = await remove_player_from_queue(user_uuid)
     if removed:
         return {
@@ -7,7 +7,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.config import logger
 from src.data.repositories import get_session
 from src.data.repositories.problem import (
+    commit_testcase_upload_session,
     create_problem_in_db,
+    create_testcase_upload_session,
     create_testcases_in_db,
     delete_problem_from_db,
     get_problem_by_id,
@@ -19,6 +21,8 @@ from src.data.schemas import (
     ProblemUpdate,
     TestCaseCreate,
     TestCaseResponse,
+    TestCaseUploadSessionCreate,
+    TestCaseUploadSessionResponse,
 )
 
 problem_logger = logger.getChild("problem")
@@ -41,11 +45,49 @@ async def create_testcases(
         {"input": tc.input, "output": tc.output} for tc in testcase_data.testcases
     ]
     problem_logger.info(
-        f"Creating {len(testcases)} testcases for problem ID: {testcase_data.problem_id}"
+        "Creating %s testcases for problem ID: %s",
+        len(testcases),
+        testcase_data.problem_id,
     )
     return await create_testcases_in_db(db, testcase_data.problem_id, testcases)
 
 
+@testcase_router.post(
+    "/session",
+    response_model=TestCaseUploadSessionResponse,
+    summary="Start a direct test case upload",
+    description="Returns presigned URLs so the client can PUT test case files straight to DigitalOcean Spaces.",
+)
+async def create_testcase_upload(
+    session_data: TestCaseUploadSessionCreate,
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Start a direct upload: the client PUTs each file to its presigned URL,
+    sending the returned headers, then commits the session.
+    """
+    problem_logger.info(
+        "Creating upload session for %s testcases for problem ID: %s",
+        session_data.testcase_count,
+        session_data.problem_id,
+    )
+    return await create_testcase_upload_session(
+        db, session_data.problem_id, session_data.testcase_count
+    )
+
+
+@testcase_router.post(
+    "/session/{session_id}/commit",
+    response_model=TestCaseResponse,
+    summary="Commit a direct test case upload",
+    description="Checks that every test case file of an upload session is in DigitalOcean Spaces, then publishes them as the problem's test cases.",
+)
+async def commit_testcase_upload(session_id: UUID4):
+    """Finish a direct upload once all of its files are stored."""
+    problem_logger.info("Committing testcase upload session: %s", session_id)
+    return await commit_testcase_upload_session(session_id)
+
+
 @problem_router.post(
     "/",
     response_model=ProblemResponse,
@@ -57,7 +99,7 @@ async def create_problem(
     db: AsyncSession = Depends(get_session),
 ):
     """Create a new problem and store it in DigitalOcean Spaces."""
-    problem_logger.info(f"Creating problem with rating: {problem_data.rating}")
+    problem_logger.info("Creating problem with rating: %s", problem_data.rating)
     return await create_problem_in_db(db, problem_data)
 
 
@@ -72,7 +114,7 @@ async def get_problem(
     db: AsyncSession = Depends(get_session),
 ):
     """Retrieve a problem by its unique ID."""
-    problem_logger.info(f"Fetching problem ID: {problem_id}")
+    problem_logger.info("Fetching problem ID: %s", problem_id)
     return await get_problem_by_id(db, problem_id)
 
 
@@ -89,7 +131,7 @@ async def update_problem(
 ):
     """Update an existing problem with new metadata or content."""
     update_data = problem_update.model_dump(exclude_unset=True)
-    problem_logger.info(f"Updating problem ID: {problem_id}")
+    problem_logger.info("Updating problem ID: %s", problem_id)
     return await update_problem_in_db(db, problem_id, update_data)
 
 
@@ -103,7 +145,7 @@ async def delete_problem(
     db: AsyncSession = Depends(get_session),
 ):
     """Delete a problem and its associated data."""
-    problem_logger.info(f"Deleting problem ID: {problem_id}")
+    problem_logger.info("Deleting problem ID: %s", problem_id)
     return await delete_problem_from_db(db, problem_id)
 
 
@@ -122,7 +164,7 @@ async def list_problems(
     List all problems with pagination.
     TODO: Implement list_problems_from_db in src/data/repositories/problem.py.
     """
-    problem_logger.info(f"Listing problems with skip: {skip}, limit: {limit}")
+    problem_logger.info("Listing problems with skip: %s, limit: %s", skip, limit)
     problem_logger.warning(
         "list_problems_from_db not implemented, returning empty list"
     )
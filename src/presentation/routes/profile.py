@@ -1,11 +1,11 @@
 import uuid
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from src.business.services.auth_dependency import get_current_user
-from src.business.services.profile import get_user_match_history_service, get_user_contribution_calendar_service, get_user_rating_history_service, get_user_topic_stats_service
+from src.business.services.profile import get_user_match_history_service, get_user_contribution_calendar_service, get_user_rating_history_service, get_user_topic_stats_service, get_user_match_history_etag_service
 from src.config import logger
 from src.data.repositories import get_session
 from src.data.schemas import MatchHistoryEntry, UserBaseResponse, ContributionCalendar, RatingHistory, MatchHistory, TopicStats
@@ -17,13 +17,26 @@ profile_logger = logger.getChild("profile")
 router = APIRouter(tags=["profile"])
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header, a list of possibly weak tags, against etag."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 @router.get(
     "/users/{user_id}/profile/match-history",
     response_model=MatchHistory,
     response_model_exclude={"created_at", "updated_at"},
 )
 async def get_user_match_history(
-    user_id: str,
+    user_id: uuid.UUID,
+    request: Request,
+    response: Response,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_session),
@@ -31,6 +44,7 @@ async def get_user_match_history(
 ):
     """
     Get match history for a specific user.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
 
     Args:
         user_id: ID of the user to get match history for
@@ -45,24 +59,26 @@ async def get_user_match_history(
         :param db:
         :param current_user:
     """
-    profile_logger.info(f"Match history request for user ID: {user_id}")
+    profile_logger.info("Match history request for user ID: %s", user_id)
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            profile_logger.warning(
-                f"Match history request failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
+        # Answer unchanged pages without loading the history
+        etag = await get_user_match_history_etag_service(db, user_id, limit, offset)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            profile_logger.info("Match history not modified for user %s", user_id)
+            return Response(status_code=304, headers=headers)
 
         # Get match history
         match_history = await get_user_match_history_service(
-            db, user_uuid, limit, offset
+            db, user_id, limit, offset
         )
+        response.headers.update(headers)
         profile_logger.info(
-            f"Match history request successful: {len(match_history.entries)} entries for user {user_id} (total: {match_history.total})"
+            "Match history request successful: %s entries for user %s (total: %s)",
+            len(match_history.entries),
+            user_id,
+            match_history.total,
         )
 
         return match_history
@@ -71,7 +87,7 @@ async def get_user_match_history(
     except DatabaseException as e:
         raise e
     except Exception as e:
-        profile_logger.error(f"Unexpected error during match history request: {str(e)}")
+        profile_logger.error("Unexpected error during match history request: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
 
 
@@ -80,7 +96,7 @@ async def get_user_match_history(
     response_model=ContributionCalendar,
 )
 async def get_user_contribution_calendar(
-    user_id: str,
+    user_id: uuid.UUID,
     year: int,
     db: AsyncSession = Depends(get_session),
     current_user: UserBaseResponse = Depends(get_current_user),
@@ -99,24 +115,20 @@ async def get_user_contribution_calendar(
         :param db:
         :param current_user:
     """
-    profile_logger.info(f"Contribution calendar request for user ID: {user_id}, year: {year}")
+    profile_logger.info(
+        "Contribution calendar request for user ID: %s, year: %s", user_id, year
+    )
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            profile_logger.warning(
-                f"Contribution calendar request failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
-
         # Get contribution calendar
         contribution_calendar = await get_user_contribution_calendar_service(
-            db, user_uuid, year
+            db, user_id, year
         )
         profile_logger.info(
-            f"Contribution calendar request successful: {len(contribution_calendar.entries)} entries for user {user_id}, year {year}"
+            "Contribution calendar request successful: %s entries for user %s, year %s",
+            len(contribution_calendar.entries),
+            user_id,
+            year,
         )
 
         return contribution_calendar
@@ -125,7 +137,9 @@ async def get_user_contribution_calendar(
     except DatabaseException as e:
         raise e
     except Exception as e:
-        profile_logger.error(f"Unexpected error during contribution calendar request: {str(e)}")
+        profile_logger.error(
+            "Unexpected error during contribution calendar request: %s", e
+        )
         raise DatabaseException(detail="An unexpected error occurred")
 
 
@@ -134,7 +148,7 @@ async def get_user_contribution_calendar(
     response_model=RatingHistory,
 )
 async def get_user_rating_history(
-    user_id: str,
+    user_id: uuid.UUID,
     db: AsyncSession = Depends(get_session),
     current_user: UserBaseResponse = Depends(get_current_user),
 ):
@@ -150,24 +164,17 @@ async def get_user_rating_history(
         :param db:
         :param current_user:
     """
-    profile_logger.info(f"Rating history request for user ID: {user_id}")
+    profile_logger.info("Rating history request for user ID: %s", user_id)
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            profile_logger.warning(
-                f"Rating history request failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
-
         # Get rating history
         rating_history = await get_user_rating_history_service(
-            db, user_uuid
+            db, user_id
         )
         profile_logger.info(
-            f"Rating history request successful: {len(rating_history.history)} entries for user {user_id}"
+            "Rating history request successful: %s entries for user %s",
+            len(rating_history.history),
+            user_id,
         )
 
         return rating_history
@@ -176,7 +183,7 @@ async def get_user_rating_history(
     except DatabaseException as e:
         raise e
     except Exception as e:
-        profile_logger.error(f"Unexpected error during rating history request: {str(e)}")
+        profile_logger.error("Unexpected error during rating history request: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
 
 
@@ -185,7 +192,7 @@ async def get_user_rating_history(
     response_model=TopicStats,
 )
 async def get_user_topic_stats(
-    user_id: str,
+    user_id: uuid.UUID,
     limit: int = Query(5, ge=1, le=10),
     db: AsyncSession = Depends(get_session),
     current_user: UserBaseResponse = Depends(get_current_user),
@@ -205,24 +212,17 @@ async def get_user_topic_stats(
         :param db:
         :param current_user:
     """
-    profile_logger.info(f"Topic statistics request for user ID: {user_id}")
+    profile_logger.info("Topic statistics request for user ID: %s", user_id)
 
     try:
-        # Convert user_id to UUID
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except ValueError:
-            profile_logger.warning(
-                f"Topic statistics request failed: Invalid user ID format: {user_id}"
-            )
-            raise BadRequestException(detail="Invalid user ID format")
-
         # Get topic statistics
         topic_stats = await get_user_topic_stats_service(
-            db, user_uuid, limit
+            db, user_id, limit
         )
         profile_logger.info(
-            f"Topic statistics request successful: {len(topic_stats.topics)} entries for user {user_id}"
+            "Topic statistics request successful: %s entries for user %s",
+            len(topic_stats.topics),
+            user_id,
         )
 
         return topic_stats
@@ -231,6 +231,6 @@ async def get_user_topic_stats(
     except DatabaseException as e:
         raise e
     except Exception as e:
-        profile_logger.error(f"Unexpected error during topic statistics request: {str(e)}")
+        profile_logger.error("Unexpected error during topic statistics request: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
 
@@ -33,18 +33,18 @@ async def get_standing(
     Returns:
         List of users sorted by rating
     """
-    standing_logger.info(f"Standing request with limit={limit}, offset={offset}")
+    standing_logger.info("Standing request with limit=%s, offset=%s", limit, offset)
 
     try:
         # Get standing
         standing = await get_standing_service(db, limit, offset)
         standing_logger.info(
-            f"Standing request successful: {len(standing.users)} entries"
+            "Standing request successful: %s entries", len(standing.users)
         )
 
         return standing
     except DatabaseException as e:
         raise e
     except Exception as e:
-        standing_logger.error(f"Unexpected error during standing request: {str(e)}")
+        standing_logger.error("Unexpected error during standing request: %s", e)
         raise DatabaseException(detail="An unexpected error occurred")
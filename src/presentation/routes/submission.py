@@ -24,16 +24,18 @@ async def submit_solution(
 ):
     if submission_data.user_id != current_user.id:
         submission_logger.warning(
-            f"Unauthorized submission attempt: User ID {submission_data.user_id} != {current_user.id}"
+            "Unauthorized submission attempt: User ID %s != %s",
+            submission_data.user_id,
+            current_user.id,
         )
         raise AuthorizationException(detail="Not authorized to submit for another user")
 
     submission_logger.info(
-        f"Processing submission for match ID: {submission_data.match_id}"
+        "Processing submission for match ID: %s", submission_data.match_id
     )
     return await SubmissionService.process_submission(
-        str(submission_data.user_id),
-        str(submission_data.match_id),
+        submission_data.user_id,
+        submission_data.match_id,
         submission_data.code,
         submission_data.language,
         db,
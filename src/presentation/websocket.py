@@ -1,10 +1,23 @@
+import asyncio
 import logging
-from typing import Any, Dict, List
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
 
+import orjson
 from fastapi import WebSocket
 
+from src.config import Config
+from src.data.repositories.redis import redis_client
+
 logger = logging.getLogger(__name__)
 
+# Frames that may wait for one socket before it is treated as too slow
+SEND_QUEUE_SIZE = 64
+
+# Every worker subscribes to this channel and delivers to the sockets it holds.
+# A message is the comma-separated recipient IDs, a newline, then the frame.
+NOTIFICATIONS_CHANNEL = "ws:notifications"
+
 
 class WebSocketManager:
     """
@@ -13,62 +26,185 @@ class WebSocketManager:
     """
 
     def __init__(self):
-        # Map of user_id to list of connected WebSockets
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Map of user_id to set of connected WebSockets
+        self.active_connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+        # Each socket gets a bounded outbound queue drained by its own writer
+        # task, so senders never wait on a slow client
+        self._outboxes: Dict[WebSocket, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        self._closing: Set[asyncio.Task] = set()
+        # Set while this worker is subscribed to NOTIFICATIONS_CHANNEL; until
+        # then frames are delivered to local sockets only
+        self._fan_out = False
 
-    async def connect(self, websocket: WebSocket, user_id: str):
+    async def connect(self, websocket: WebSocket, user_id: str) -> bool:
         """
         Connect a WebSocket for a user.
         A user can have multiple active connections (e.g., multiple browser tabs).
+        Returns False, after closing the socket with 1013 (try again later),
+        when the worker already holds the maximum number of connections.
         """
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        if len(self._outboxes) >= Config.WS_MAX_CONNECTIONS:
+            logger.warning(
+                "WebSocket limit of %s reached, rejecting user %s",
+                Config.WS_MAX_CONNECTIONS,
+                user_id,
+            )
+            await websocket.close(code=1013, reason="Server is at capacity")
+            return False
+        self.active_connections[user_id].add(websocket)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        writer = asyncio.create_task(self._writer(websocket, user_id, queue))
+        self._outboxes[websocket] = (queue, writer)
         logger.info(
-            f"WebSocket connected for user {user_id}. Total connections: {len(self.active_connections[user_id])}"
+            "WebSocket connected for user %s. Total connections: %s",
+            user_id,
+            len(self.active_connections[user_id]),
         )
+        return True
 
     def disconnect(self, websocket: WebSocket, user_id: str):
         """
         Disconnect a WebSocket for a user.
         """
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-                logger.info(
-                    f"WebSocket disconnected for user {user_id}. Remaining connections: {len(self.active_connections[user_id])}"
-                )
+        outbox = self._outboxes.pop(websocket, None)
+        if outbox is not None and outbox[1] is not asyncio.current_task():
+            outbox[1].cancel()
 
-            # Clean up if no more connections for this user
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
-                logger.info(
-                    f"No more connections for user {user_id}. Removed from active connections."
-                )
+        connections = self.active_connections.get(user_id)
+        if connections is None:
+            return
+
+        connections.discard(websocket)
+        logger.info(
+            "WebSocket disconnected for user %s. Remaining connections: %s",
+            user_id,
+            len(connections),
+        )
+
+        # Clean up if no more connections for this user
+        if not connections:
+            self.active_connections.pop(user_id, None)
+            logger.info(
+                "No more connections for user %s. Removed from active connections.",
+                user_id,
+            )
 
     async def send_match_notification(self, user_id: str, message: Any):
         """
         Send a notification to all WebSocket connections for a user.
+        The message is serialized once and the same text is sent to every socket.
+        orjson encodes UUID and datetime values natively, so callers need not
+        stringify them.
+        """
+        await self.send_raw(user_id, orjson.dumps(message).decode())
+
+    async def broadcast(self, user_ids: Iterable[str], message: Any):
+        """
+        Send the same notification to several users, serializing it only once.
+        """
+        await self._publish(list(user_ids), orjson.dumps(message).decode())
+
+    async def send_raw(self, user_id: str, data: str):
+        """
+        Send already-serialized JSON text to all WebSocket connections for a user.
+        """
+        await self._publish([user_id], data)
+
+    async def _publish(self, user_ids: List[str], data: str):
+        """
+        Publish a frame once for all recipients; whichever workers hold their
+        sockets deliver it.
         """
-        if user_id in self.active_connections:
-            disconnected_websockets = []
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_json(message)
-                    logger.debug(f"Notification sent to user {user_id}")
-                except Exception as e:
-                    logger.error(
-                        f"Error sending notification to user {user_id}: {str(e)}"
-                    )
-                    disconnected_websockets.append(websocket)
-
-            # Clean up any disconnected websockets
-            for websocket in disconnected_websockets:
+        if self._fan_out:
+            try:
+                await redis_client.publish(
+                    NOTIFICATIONS_CHANNEL, ",".join(user_ids) + "\n" + data
+                )
+                return
+            except Exception as e:
+                logger.error("Error publishing notification, delivering locally: %s", e)
+        for user_id in user_ids:
+            self._deliver(user_id, data)
+
+    async def listen(self):
+        """
+        Deliver notifications published by any worker to this worker's sockets.
+        Runs until cancelled.
+        """
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(NOTIFICATIONS_CHANNEL)
+        self._fan_out = True
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                recipients, _, data = message["data"].partition("\n")
+                for user_id in recipients.split(","):
+                    self._deliver(user_id, data)
+        finally:
+            self._fan_out = False
+            await pubsub.aclose()
+
+    def _deliver(self, user_id: str, data: str):
+        """
+        Queue a frame for every socket of the user held by this worker.
+        """
+        connections = self.active_connections.get(user_id)
+        if not connections:
+            logger.debug("No active WebSocket connections for user %s", user_id)
+            return
+
+        # Hand the frame to each socket's writer; one slow tab doesn't hold up the rest
+        for websocket in list(connections):
+            queue, _ = self._outboxes[websocket]
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning(
+                    "WebSocket send queue full for user %s, closing connection",
+                    user_id,
+                )
                 self.disconnect(websocket, user_id)
-        else:
-            logger.debug(f"No active WebSocket connections for user {user_id}")
+                task = asyncio.create_task(self._close(websocket, code=1013))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        logger.debug("Notification queued for user %s", user_id)
+
+    async def _writer(self, websocket: WebSocket, user_id: str, queue: asyncio.Queue):
+        """
+        Send queued frames to one socket in order until it fails or disconnects.
+        """
+        while True:
+            data = await queue.get()
+            try:
+                await websocket.send_text(data)
+            except Exception as e:
+                logger.error("Error sending notification to user %s: %s", user_id, e)
+                self.disconnect(websocket, user_id)
+                return
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            # Already closed by the client
+            pass
 
 
 # Create a singleton instance
 manager = WebSocketManager()
+
+
+async def run_notification_listener(retry_delay: float = 1.0):
+    """
+    Keep this worker subscribed to published notifications, resubscribing
+    after a lost Redis connection.
+    """
+    while True:
+        try:
+            await manager.listen()
+        except Exception as e:
+            logger.error("Notification listener failed, resubscribing: %s", e)
+        await asyncio.sleep(retry_delay)